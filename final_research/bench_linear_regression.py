@@ -0,0 +1,57 @@
+# bench_linear_regression.py
+# Wall time and test RMSE of the custom Linear_Regression solvers against sklearn's
+# LinearRegression on the FD001 features, with the training rows replicated to see how
+# each one scales.
+#   cd final_research && python bench_linear_regression.py [--replicate 1 4 16]
+import argparse
+import time
+import numpy as np
+
+from final_research_code import (load_data, compute_rul, add_rolling_features, prepare_datasets,
+                                 scale_data, Linear_Regression, SklearnLinearRegression)
+
+DATA = '../dataset/CMAPSSData/'
+
+
+def load_features():
+    train_df, test_df, rul_df = load_data(DATA + 'train_FD001.txt', DATA + 'test_FD001.txt',
+                                          DATA + 'RUL_FD001.txt')
+    train_df, test_rul = compute_rul(train_df, test_df, rul_df)
+    sensor_cols = [c for c in train_df.columns if 'sensor' in c]
+    train_df = add_rolling_features(train_df, sensor_cols, 20)
+    test_rul = add_rolling_features(test_rul, sensor_cols, 20)
+    sensor_cols = sensor_cols + [f'{c}_rollmean20' for c in sensor_cols]
+    X_train, y_train, X_val, y_val, X_test, y_test, _ = prepare_datasets(train_df, test_rul, sensor_cols)
+    X_train_s, _, X_test_s, _ = scale_data(X_train, X_val, X_test)
+    return X_train_s, y_train.values, X_test_s, y_test.values
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--replicate', type=int, nargs='+', default=[1, 4, 16],
+                        help='stack the training set N times (one row of output per N)')
+    parser.add_argument('--iterations', type=int, default=5000, help='full-batch gradient steps')
+    parser.add_argument('--epochs', type=int, default=5, help='mini-batch SGD epochs')
+    parser.add_argument('--tol', type=float, default=1e-4, help='early-stopping tolerance for gd')
+    args = parser.parse_args()
+
+    X_tr, y_tr, X_te, y_te = load_features()
+    candidates = {
+        'sklearn':          lambda: SklearnLinearRegression(),
+        'normal':           lambda: Linear_Regression(solver='normal'),
+        'gd (fixed)':       lambda: Linear_Regression(lr=0.001, iterations=args.iterations),
+        'gd (early stop)':  lambda: Linear_Regression(lr=0.1, iterations=args.iterations, tol=args.tol),
+        'sgd':              lambda: Linear_Regression(lr=0.01, iterations=args.epochs, solver='sgd'),
+    }
+
+    print(f"{'rows':>9} │ {'solver':<16} │ {'fit s':>8} │ {'iters':>6} │ {'test RMSE':>9}")
+    for times in args.replicate:
+        X, y = np.tile(X_tr, (times, 1)), np.tile(y_tr, times)
+        for name, make in candidates.items():
+            model = make()
+            t0 = time.perf_counter()
+            model.fit(X, y)
+            fit_s = time.perf_counter() - t0
+            rmse = np.sqrt(np.mean((y_te - model.predict(X_te)) ** 2))
+            iters = getattr(model, 'n_iter_', '')
+            print(f"{len(X):>9} │ {name:<16} │ {fit_s:>8.3f} │ {iters:>6} │ {rmse:>9.3f}")
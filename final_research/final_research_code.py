@@ -1,12 +1,21 @@
+import os
+import json
+import hashlib
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # figures are saved under FIG_DIR, never shown
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 import seaborn as sns
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.linear_model import LinearRegression as SklearnLinearRegression
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 
+FIG_DIR = 'figures'
+EDA_CACHE_DIR = '.cache/eda'
+
 # ========== Load Data ==========
 
 def load_data(train_path, test_path, rul_path):
@@ -102,30 +111,130 @@ def scale_data(X_train, X_val, X_test):
 # ========= Custom Linear Regression (both LR are for baseline)========
 
 class Linear_Regression:
-    def __init__(self, lr=0.001, iterations=5000):
+    # Least-squares baseline with three solvers behind the same fit/predict API:
+    #   'gd'     full-batch gradient descent with preallocated buffers; stops early once the
+    #            loss improves by less than `tol` (relative) if tol is set
+    #   'sgd'    mini-batch SGD, `iterations` epochs of `batch_size` rows
+    #   'normal' closed form from the normal equations, one pass over the data
+    # 'sgd' and 'normal' also learn from a stream of (X, y) chunks via fit_batches/partial_fit.
+    SOLVERS = ('gd', 'sgd', 'normal')
+
+    def __init__(self, lr=0.001, iterations=5000, solver='gd', tol=None, batch_size=256, seed=42):
+        if solver not in self.SOLVERS:
+            raise ValueError(f"solver must be one of {self.SOLVERS}, got {solver!r}")
         self.lr = lr
         self.iterations = iterations
+        self.solver = solver
+        self.tol = tol
+        self.batch_size = batch_size
+        self.seed = seed
+        self._reset()
+
+    def _reset(self):
+        self.W = None
+        self.b = 0.0
+        self.n_iter_ = 0
+        self._n = 0
 
     def fit(self, X, Y):
-        self.l, self.p = X.shape
-        self.W = np.zeros(self.p)
-        self.b = 0
-        self.X = X
-        self.Y = Y
-        for _ in range(self.iterations):
-            self._update_weights()
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        Y = np.asarray(Y, dtype=np.float64).ravel()
+        if self.solver == 'gd':
+            return self._fit_gd(X, Y)
+        if self.solver == 'normal':
+            return self.fit_batches(lambda: iter([(X, Y)]))
+        return self.fit_batches(lambda: iter_batches(X, Y, self.batch_size, self.seed + self.n_iter_))
+
+    def fit_batches(self, batches, epochs=None):
+        # `batches` is a callable returning a fresh iterator of (X, y) chunks for every epoch
+        if self.solver == 'gd':
+            raise ValueError("the 'gd' solver needs the full matrix; use fit() or solver='sgd'/'normal'")
+        self._reset()
+        if epochs is None:
+            epochs = 1 if self.solver == 'normal' else self.iterations
+        for _ in range(epochs):
+            for X, Y in batches():
+                self._partial_fit(np.asarray(X, dtype=np.float64), np.asarray(Y, dtype=np.float64).ravel())
+            self.n_iter_ += 1
+        if self.solver == 'normal':
+            self._solve_normal()
+        return self
+
+    def partial_fit(self, X, Y):
+        if self.solver == 'gd':
+            raise ValueError("partial_fit needs solver='sgd' or 'normal'")
+        self._partial_fit(np.asarray(X, dtype=np.float64), np.asarray(Y, dtype=np.float64).ravel())
+        if self.solver == 'normal':
+            self._solve_normal()
         return self
 
-    def _update_weights(self):
-        Y_pred = self.predict(self.X)
-        dW = -2 * self.X.T.dot(self.Y - Y_pred) / self.l
-        db = -2 * np.sum(self.Y - Y_pred) / self.l
-        self.W -= self.lr * dW
-        self.b -= self.lr * db
+    def _partial_fit(self, X, Y):
+        if self.W is None:
+            self.W = np.zeros(X.shape[1])
+        if self.solver == 'sgd':
+            resid = X.dot(self.W)
+            resid += self.b
+            resid -= Y
+            step = 2 * self.lr / len(X)
+            self.W -= step * resid.dot(X)
+            self.b -= step * resid.sum()
+            return
+        # normal equations: accumulate sums around the first chunk's mean, which keeps
+        # X'X well conditioned for raw (unscaled) sensor values
+        if self._n == 0:
+            self._x0, self._y0 = X.mean(axis=0), Y.mean()
+            p = X.shape[1]
+            self._sx, self._sy = np.zeros(p), 0.0
+            self._xtx, self._xty = np.zeros((p, p)), np.zeros(p)
+        Xs, Ys = X - self._x0, Y - self._y0
+        self._n += len(X)
+        self._sx += Xs.sum(axis=0)
+        self._sy += Ys.sum()
+        self._xtx += Xs.T.dot(Xs)
+        self._xty += Xs.T.dot(Ys)
+
+    def _solve_normal(self):
+        mx, my = self._sx / self._n, self._sy / self._n
+        cov = self._xtx - self._n * np.outer(mx, mx)
+        rhs = self._xty - self._n * mx * my
+        # minimum-norm solution, so constant or collinear sensors don't make it singular
+        self.W = np.linalg.lstsq(cov, rhs, rcond=None)[0]
+        self.b = float(self._y0 + my - (self._x0 + mx).dot(self.W))
+
+    def _fit_gd(self, X, Y):
+        self._reset()
+        l, p = X.shape
+        self.W = np.zeros(p)
+        resid = np.empty(l)
+        grad = np.empty(p)
+        step = 2 * self.lr / l
+        prev = np.inf
+        for it in range(self.iterations):
+            np.dot(X, self.W, out=resid)
+            resid += self.b
+            resid -= Y                      # prediction - target
+            if self.tol is not None:
+                loss = resid.dot(resid) / l
+                if loss >= prev * (1 - self.tol):
+                    break
+                prev = loss
+            np.dot(resid, X, out=grad)
+            grad *= step
+            self.W -= grad
+            self.b -= step * resid.sum()
+            self.n_iter_ = it + 1
+        return self
 
     def predict(self, X):
         return X.dot(self.W) + self.b
 
+def iter_batches(X, Y, batch_size=256, seed=42):
+    # shuffled in-memory chunks; any iterator of (X, y) chunks works with fit_batches
+    idx = np.random.default_rng(seed).permutation(len(X))
+    for i in range(0, len(idx), batch_size):
+        j = idx[i:i + batch_size]
+        yield X[j], Y[j]
+
 # ========== Evaluation ==========
 
 def evaluate(y_true, y_pred, label=''):
@@ -145,53 +254,78 @@ from sklearn.metrics import mean_squared_error, mean_absolute_error
 # (Other functions: load_data, compute_rul, prepare_datasets, scale_data, Linear_Regression, evaluate)
 
 # ======== Exploratory Visualizations ========
-def exploratory_visualizations(train_df, sensor_cols, corr_threshold=0.8):
-    # 1a) Engine lifetime distribution
-    print("""
-
-    Plotting engine lifetime distribution → shows how many cycles engines typically run before failure.
+# All statistics come out of one vectorized pass over the frame and are cached on disk,
+# keyed by the data and sensor set; figures are saved as PNGs instead of shown, so batch
+# runs never block and a repeated run only reloads the cache.
+
+def eda_cache_key(train_df, sensor_cols):
+    cols = ['unit_number', 'time_in_cycles', 'RUL'] + list(sensor_cols)
+    h = hashlib.sha1(pd.util.hash_pandas_object(train_df[cols], index=False).to_numpy().tobytes())
+    h.update(json.dumps(list(sensor_cols)).encode())
+    return h.hexdigest()[:16]
+
+def compute_eda_stats(train_df, sensor_cols, trend_every=10, trend_window=10):
+    df = train_df.sort_values(['unit_number', 'time_in_cycles'])
+    X = df[sensor_cols].to_numpy(dtype=np.float64)
+
+    # engine lifetimes and the full correlation matrix (NaN for constant sensors)
+    lifetimes = df.groupby('unit_number')['time_in_cycles'].max().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c = np.corrcoef(X, rowvar=False)
+    const = np.ptp(X, axis=0) == 0
+    c[const, :] = np.nan
+    c[:, const] = np.nan
+    corr = pd.DataFrame(c, index=sensor_cols, columns=sensor_cols)
+
+    # box-plot statistics (no fliers) for every sensor at once
+    q1, med, q3 = np.percentile(X, [25, 50, 75], axis=0)
+    iqr = q3 - q1
+    whislo = np.where(X >= q1 - 1.5 * iqr, X, np.inf).min(axis=0)
+    whishi = np.where(X <= q3 + 1.5 * iqr, X, -np.inf).max(axis=0)
+    boxes = [{'label': c, 'q1': q1[i], 'med': med[i], 'q3': q3[i], 'whislo': whislo[i], 'whishi': whishi[i]}
+             for i, c in enumerate(sensor_cols)]
+
+    # rolling-mean trend vs RUL for every trend_every-th engine, one grouped rolling pass
+    sel = df[df['unit_number'] % trend_every == 0]
+    rolled = (sel.groupby('unit_number')[sensor_cols].rolling(trend_window).mean()
+                 .reset_index(level=0, drop=True))
+    bounds = np.flatnonzero(np.diff(sel['unit_number'].to_numpy())) + 1
+    trends = {'rul': sel['RUL'].to_numpy(), 'values': rolled[sensor_cols].to_numpy(), 'bounds': bounds}
+
+    return {'sensor_cols': list(sensor_cols), 'lifetimes': lifetimes, 'corr': corr,
+            'boxes': boxes, 'trends': trends}
+
+def high_corr_pairs(corr, threshold=0.8):
+    c = corr.to_numpy()
+    i, j = np.triu_indices(len(c), k=1)
+    keep = np.abs(c[i, j]) >= threshold
+    cols = corr.columns
+    return [(cols[a], cols[b], c[a, b]) for a, b in zip(i[keep], j[keep])]
+
+def render_eda(stats, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    sensor_cols = stats['sensor_cols']
+
+    def save(fig, name):
+        fig.tight_layout(); fig.savefig(os.path.join(out_dir, name), dpi=100); plt.close(fig)
 
-    """)
-    lifetimes = train_df.groupby('unit_number')['time_in_cycles'].max()
-    plt.figure(figsize=(6,4))
-    sns.histplot(lifetimes, bins=30, kde=True)
+    # 1a) Engine lifetime distribution
+    fig = plt.figure(figsize=(6,4))
+    sns.histplot(stats['lifetimes'], bins=30, kde=True)
     plt.title('Engine Lifetime Distribution'); plt.xlabel('Cycles'); plt.ylabel('Count')
-    plt.grid(True); plt.show()
+    plt.grid(True)
+    save(fig, 'lifetimes.png')
 
     # 1b) Sensor correlation heatmap
-    print("""
-
-    Plotting sensor correlation heatmap → identifies highly correlated sensors (for possible feature reduction).
-
-    """)
-    corr = train_df[sensor_cols].corr()
-    # Print pairs above threshold
-    high_corr = []
-    for i in range(len(sensor_cols)):
-        for j in range(i+1, len(sensor_cols)):
-            if abs(corr.iloc[i,j]) >= corr_threshold:
-                high_corr.append((sensor_cols[i], sensor_cols[j], corr.iloc[i,j]))
-    if high_corr:
-        print(f"Sensor pairs with |corr| ≥ {corr_threshold}: ")
-        for s1, s2, val in high_corr:
-            print(f"  {s1} ↔ {s2}: {val:.2f}")
-    else:
-        print(f"No sensor pairs exceed correlation threshold of {corr_threshold}.")
-
-    plt.figure(figsize=(12,12))
-    sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm',
+    fig = plt.figure(figsize=(12,12))
+    sns.heatmap(stats['corr'], annot=True, fmt='.2f', cmap='coolwarm',
                 xticklabels=sensor_cols, yticklabels=sensor_cols)
     plt.xticks(rotation=45, ha='right')
     plt.yticks(rotation=0)
     plt.title('Sensor–Sensor Correlation Heatmap')
-    plt.tight_layout(); plt.show()
-
-    # 1c) Boxplots of sensor distributions (4 per figure)
-    print("""
+    save(fig, 'correlation.png')
 
-    Plotting boxplots of each sensor (fliers hidden) → sees overall ranges and potential skew/outliers.
-
-    """)
+    # 1c) Boxplots of sensor distributions (4 per figure), drawn from the precomputed stats
     sensors_per_fig = 4
     for i in range(0, len(sensor_cols), sensors_per_fig):
         fig, axes = plt.subplots(2, 2, figsize=(8,6))
@@ -199,28 +333,24 @@ def exploratory_visualizations(train_df, sensor_cols, corr_threshold=0.8):
         for j in range(sensors_per_fig):
             idx = i + j
             if idx < len(sensor_cols):
-                sensor = sensor_cols[idx]
-                axes[j].boxplot(train_df[sensor], showfliers=False)
-                axes[j].set_title(sensor)
+                axes[j].bxp([stats['boxes'][idx]], showfliers=False)
+                axes[j].set_title(sensor_cols[idx])
                 axes[j].grid(True)
             else:
                 axes[j].axis('off')
-        plt.tight_layout(); plt.show()
-
-    # 1d) Sample sensor vs RUL curves (every 10th engine for all sensors)
-    print("""
-
-    Plotting rolling-mean sensor behavior vs RUL for select engines → inspects degradation trends.
+        save(fig, f'boxplots_{i // sensors_per_fig + 1}.png')
 
-    """)
+    # 1d) Rolling-mean sensor behaviour vs RUL, one line collection per sensor
+    tr = stats['trends']
+    rul_segs = np.split(tr['rul'], tr['bounds'])
+    colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
     n_rows = int(np.ceil(len(sensor_cols) / 2))
     fig, axes = plt.subplots(n_rows, 2, figsize=(12, 3 * n_rows))
     axes = axes.flatten()
     for idx, sensor in enumerate(sensor_cols):
-        for uid in train_df['unit_number'].unique():
-            if uid % 10 == 0:
-                sub = train_df[train_df['unit_number']==uid]
-                axes[idx].plot(sub['RUL'], sub[sensor].rolling(10).mean(), alpha=0.6)
+        segs = [np.column_stack([r, v]) for r, v in zip(rul_segs, np.split(tr['values'][:, idx], tr['bounds']))]
+        axes[idx].add_collection(LineCollection(segs, colors=colors, alpha=0.6))
+        axes[idx].autoscale()
         axes[idx].set_xlim(250, 0)
         axes[idx].set_title(f'{sensor} vs RUL')
         axes[idx].set_xlabel('RUL')
@@ -228,14 +358,48 @@ def exploratory_visualizations(train_df, sensor_cols, corr_threshold=0.8):
         axes[idx].grid(True)
     for j in range(len(sensor_cols), len(axes)):
         axes[j].axis('off')
-    plt.tight_layout(); plt.show()
+    save(fig, 'sensor_trends.png')
+
+def exploratory_visualizations(train_df, sensor_cols, corr_threshold=0.8,
+                               out_dir=FIG_DIR, cache_dir=EDA_CACHE_DIR):
+    key = eda_cache_key(train_df, sensor_cols)
+    cache_path = os.path.join(cache_dir, f'eda_{key}.pkl')
+    if os.path.exists(cache_path):
+        stats = pd.read_pickle(cache_path)
+        print(f"Loaded cached exploratory statistics from {cache_path}")
+    else:
+        stats = compute_eda_stats(train_df, sensor_cols)
+        os.makedirs(cache_dir, exist_ok=True)
+        pd.to_pickle(stats, cache_path)
+
+    high_corr = high_corr_pairs(stats['corr'], corr_threshold)
+    if high_corr:
+        print(f"Sensor pairs with |corr| ≥ {corr_threshold}: ")
+        for s1, s2, val in high_corr:
+            print(f"  {s1} ↔ {s2}: {val:.2f}")
+    else:
+        print(f"No sensor pairs exceed correlation threshold of {corr_threshold}.")
+
+    # figures are rendered once per data/sensor set; sensor_trends.png is written last
+    fig_dir = os.path.join(out_dir, f'eda_{key}')
+    if not os.path.exists(os.path.join(fig_dir, 'sensor_trends.png')):
+        render_eda(stats, fig_dir)
+    print(f"""
+
+    Exploratory figures (engine lifetimes, sensor correlation heatmap, sensor boxplots,
+    rolling-mean sensor behavior vs RUL) are in {fig_dir}/
+
+    """)
+    return stats
 
 # ========== Predicted vs True Scatter‐Plots ==========
 
-def plot_predicted_vs_true(y_true, y_pred, title):
+def plot_predicted_vs_true(y_true, y_pred, title, out_dir=FIG_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, title.lower().replace(':', '').replace(' ', '_') + '.png')
     print(f"""
 
-    Scatter plot of predictions → how close points lie to the ideal y=x line.
+    Scatter plot of predictions → how close points lie to the ideal y=x line ({path}).
 
     """)
     plt.figure(figsize=(5,5))
@@ -244,7 +408,7 @@ def plot_predicted_vs_true(y_true, y_pred, title):
     plt.plot([0,m],[0,m], linestyle='--')            # ideal line
     plt.xlabel('True RUL'); plt.ylabel('Predicted RUL')
     plt.title(title)
-    plt.tight_layout(); plt.show()
+    plt.tight_layout(); plt.savefig(path, dpi=100); plt.close()
 
 # ======== Main Pipeline =========
 
@@ -321,59 +485,61 @@ def run_pipeline(train_path, test_path, rul_path, sensor_cols=None, rolling_wind
         # optional scatter
         plot_predicted_vs_true(y_test, y_te, f'{name}: True vs Predicted')
 
-# ========== Run Pipeline with all sensors and no rolling window ==========
+if __name__ == "__main__":
+    # ========== Run Pipeline with all sensors and no rolling window ==========
 
-run_pipeline(
-    train_path='../dataset/CMAPSSData/train_FD001.txt',
-    test_path='../dataset/CMAPSSData/test_FD001.txt',
-    rul_path='../dataset/CMAPSSData/RUL_FD001.txt'
-)
+    run_pipeline(
+        train_path='../dataset/CMAPSSData/train_FD001.txt',
+        test_path='../dataset/CMAPSSData/test_FD001.txt',
+        rul_path='../dataset/CMAPSSData/RUL_FD001.txt'
+    )
 
-# ========== Run Pipeline with only useful sensors and no rolling window ==========
+    # ========== Run Pipeline with only useful sensors and no rolling window ==========
 
-reduced_sensor_cols = ['sensor_measurement_{}'.format(i) for i in range(1,22) if i not in [1,5,6,10,16,18,19]]
+    reduced_sensor_cols = ['sensor_measurement_{}'.format(i) for i in range(1,22) if i not in [1,5,6,10,16,18,19]]
 
-run_pipeline(train_path='../dataset/CMAPSSData/train_FD001.txt',
-    test_path='../dataset/CMAPSSData/test_FD001.txt',
-    rul_path='../dataset/CMAPSSData/RUL_FD001.txt',
-    sensor_cols=reduced_sensor_cols)
+    run_pipeline(train_path='../dataset/CMAPSSData/train_FD001.txt',
+        test_path='../dataset/CMAPSSData/test_FD001.txt',
+        rul_path='../dataset/CMAPSSData/RUL_FD001.txt',
+        sensor_cols=reduced_sensor_cols)
 
-# ========== Run Pipeline with only useful sensors and WITH rolling window ==========
+    # ========== Run Pipeline with only useful sensors and WITH rolling window ==========
 
-reduced_sensor_cols = ['sensor_measurement_{}'.format(i) for i in range(1,22) if i not in [1,5,6,10,16,18,19]]
+    reduced_sensor_cols = ['sensor_measurement_{}'.format(i) for i in range(1,22) if i not in [1,5,6,10,16,18,19]]
 
-run_pipeline(train_path='../dataset/CMAPSSData/train_FD001.txt',
-    test_path='../dataset/CMAPSSData/test_FD001.txt',
-    rul_path='../dataset/CMAPSSData/RUL_FD001.txt',
-    sensor_cols=reduced_sensor_cols, rolling_window=True)
+    run_pipeline(train_path='../dataset/CMAPSSData/train_FD001.txt',
+        test_path='../dataset/CMAPSSData/test_FD001.txt',
+        rul_path='../dataset/CMAPSSData/RUL_FD001.txt',
+        sensor_cols=reduced_sensor_cols, rolling_window=True)
 
-train_df, test_df, rul_df = load_data(train_path='../dataset/CMAPSSData/train_FD001.txt',
-    test_path='../dataset/CMAPSSData/test_FD001.txt',
-    rul_path='../dataset/CMAPSSData/RUL_FD001.txt')
-train_df, test_rul = compute_rul(train_df, test_df, rul_df)
+    train_df, test_df, rul_df = load_data(train_path='../dataset/CMAPSSData/train_FD001.txt',
+        test_path='../dataset/CMAPSSData/test_FD001.txt',
+        rul_path='../dataset/CMAPSSData/RUL_FD001.txt')
+    train_df, test_rul = compute_rul(train_df, test_df, rul_df)
 
 
-sensor_cols = [c for c in train_df.columns if 'sensor' in c]
-X_train, y_train, X_val, y_val, X_test, y_test, sensor_cols = prepare_datasets(train_df, test_rul, sensor_cols)
+    sensor_cols = [c for c in train_df.columns if 'sensor' in c]
+    X_train, y_train, X_val, y_val, X_test, y_test, sensor_cols = prepare_datasets(train_df, test_rul, sensor_cols)
 
 
-# after: X_train, y_train, X_val, y_val, X_test, y_test, sensor_cols = prepare_datasets(…)
-import matplotlib.pyplot as plt
+    # after: X_train, y_train, X_val, y_val, X_test, y_test, sensor_cols = prepare_datasets(…)
+    import matplotlib.pyplot as plt
 
-# Show summary statistics
-print("Validation  RUL summary:")
-print(y_val.describe())
-print("\nTest  RUL summary:")
-print(y_test.describe())
+    # Show summary statistics
+    print("Validation  RUL summary:")
+    print(y_val.describe())
+    print("\nTest  RUL summary:")
+    print(y_test.describe())
 
-# Overlaid histograms
-plt.hist(y_val, bins=20, alpha=0.6, label='Validation RUL')
-plt.hist(y_test, bins=20, alpha=0.6, label='Test RUL')
-plt.xlabel("RUL"); plt.ylabel("Count")
-plt.legend(); plt.title("RUL distribution: Val vs Test")
-plt.show()
+    # Overlaid histograms
+    plt.hist(y_val, bins=20, alpha=0.6, label='Validation RUL')
+    plt.hist(y_test, bins=20, alpha=0.6, label='Test RUL')
+    plt.xlabel("RUL"); plt.ylabel("Count")
+    plt.legend(); plt.title("RUL distribution: Val vs Test")
+    os.makedirs(FIG_DIR, exist_ok=True)
+    plt.savefig(os.path.join(FIG_DIR, 'rul_val_vs_test.png'), dpi=100); plt.close()
 
-print( """
+    print( """
 
 Rank	Model	Reason
 🥇	SVR (RBF)	Best generalization, lowest test RMSE + MAE, stable performance overall
@@ -0,0 +1,282 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.model_selection import GroupKFold
+from sklearn.preprocessing import MinMaxScaler
+from sklearn.metrics import mean_squared_error, mean_absolute_error
+from threadpoolctl import threadpool_limits
+
+from final_research_code import load_data, add_rolling_features, Linear_Regression
+
+# Hyperparameter search over models, their parameters, rolling window, RUL cap and sensor
+# set. Features are built once per subset and cached as .npy files that the worker
+# processes memory-map; every configuration is scored with engine-grouped K-fold CV (no
+# engine in both the training and validation folds) and appended to a JSONL checkpoint
+# as soon as it finishes, so re-running the same command resumes an interrupted sweep.
+#
+#   python search.py --models svr rf --search random --n-iter 40 --jobs 8
+#   python search.py --models svr --windows 0 20 --caps 125 165 --refit-best
+
+DATA_DIR = '../dataset/CMAPSSData/'
+CACHE_DIR = '.cache/search'
+RESULTS_FILE = 'search_results.jsonl'
+
+SENSOR_COLS = [f'sensor_measurement_{i}' for i in range(1, 22)]
+# same reduced set as the final script (drops the near-constant sensors)
+REDUCED_SENSOR_COLS = [f'sensor_measurement_{i}' for i in range(1, 22) if i not in [1, 5, 6, 10, 16, 18, 19]]
+SENSOR_SETS = {'all': SENSOR_COLS, 'reduced': REDUCED_SENSOR_COLS}
+
+# ========== Search Space ==========
+
+MODEL_GRIDS = {
+    'linear':    {},
+    'custom_lr': {'lr': [0.001, 0.01], 'iterations': [5000]},
+    'svr':       {'C': [0.1, 1.0, 10.0], 'epsilon': [0.05, 0.5], 'gamma': ['scale', 0.01, 0.1]},
+    'rf':        {'n_estimators': [300], 'max_depth': [10, 20]},
+    'xgb':       {'n_estimators': [300], 'learning_rate': [0.05, 0.1], 'max_depth': [3, 5]},
+}
+DATA_GRID = {'window': [0, 10, 20, 30], 'cap': [125, 165, 200], 'sensors': ['all', 'reduced']}
+
+
+def make_model(cfg):
+    name = cfg['model']
+    if name == 'linear':
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression()
+    if name == 'custom_lr':
+        return Linear_Regression(lr=cfg['lr'], iterations=cfg['iterations'])
+    if name == 'svr':
+        from sklearn.svm import SVR
+        return SVR(C=cfg['C'], epsilon=cfg['epsilon'], gamma=cfg['gamma'], kernel='rbf')
+    if name == 'rf':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(n_estimators=cfg['n_estimators'], max_depth=cfg['max_depth'],
+                                     random_state=42, n_jobs=1)
+    if name == 'xgb':
+        import xgboost as xgb
+        return xgb.XGBRegressor(n_estimators=cfg['n_estimators'], learning_rate=cfg['learning_rate'],
+                                max_depth=cfg['max_depth'], random_state=42, n_jobs=1)
+    raise ValueError(f"unknown model {name!r}")
+
+
+def config_grid(models, windows, caps, sensor_sets):
+    configs = []
+    for name in models:
+        grid = MODEL_GRIDS[name]
+        for values in itertools.product(*grid.values()):
+            for window, cap, sensors in itertools.product(windows, caps, sensor_sets):
+                configs.append({'model': name, **dict(zip(grid, values)),
+                                'window': window, 'cap': cap, 'sensors': sensors})
+    return configs
+
+
+def config_key(cfg, subset, n_folds):
+    # the data and CV split are part of the key: scores from another subset or fold count
+    # aren't reused
+    return json.dumps({**cfg, 'subset': subset, 'folds': n_folds}, sort_keys=True)
+
+# ========== Feature Cache ==========
+
+def _source_stats(paths):
+    return {os.path.basename(p): [os.path.getsize(p), os.stat(p).st_mtime_ns] for p in paths}
+
+
+def build_cache(subset='FD001', windows=(0, 10, 20, 30), data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    # Writes units / uncapped RUL / raw sensors and one rolling-mean block per window for
+    # the train set, plus the last cycle of every test engine. Windows already cached for
+    # unchanged data files are kept.
+    paths = [os.path.join(data_dir, f'{kind}_{subset}.txt') for kind in ('train', 'test', 'RUL')]
+    out = os.path.join(cache_dir, subset)
+    meta_path = os.path.join(out, 'meta.json')
+    meta = {}
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+    # the base arrays are rebuilt (and every window dropped) when a data file changed
+    stale = meta.get('sources') != _source_stats(paths) or not os.path.exists(os.path.join(out, 'units.npy'))
+    if stale:
+        meta = {'sources': _source_stats(paths), 'windows': []}
+    todo = [w for w in windows if w and w not in meta['windows']]
+    if not stale and not todo:
+        return out
+
+    os.makedirs(out, exist_ok=True)
+    train_df, test_df, rul_df = load_data(*paths)
+    train_df = train_df.sort_values(['unit_number', 'time_in_cycles'])
+    test_df = test_df.sort_values(['unit_number', 'time_in_cycles'])
+    rul = train_df.groupby('unit_number')['time_in_cycles'].transform('max') - train_df['time_in_cycles']
+    last = test_df.groupby('unit_number').cumcount(ascending=False).to_numpy() == 0
+
+    np.save(os.path.join(out, 'units.npy'), train_df['unit_number'].to_numpy(np.int32))
+    np.save(os.path.join(out, 'rul.npy'), rul.to_numpy(np.float32))
+    np.save(os.path.join(out, 'sensors.npy'), train_df[SENSOR_COLS].to_numpy(np.float32))
+    np.save(os.path.join(out, 'test_sensors.npy'), test_df[SENSOR_COLS].to_numpy(np.float32)[last])
+    np.save(os.path.join(out, 'test_rul.npy'), rul_df[0].to_numpy(np.float32))
+    for w in todo:
+        # test rolling means use each engine's whole trajectory up to its last cycle
+        cols = [f'{c}_rollmean{w}' for c in SENSOR_COLS]
+        np.save(os.path.join(out, f'roll{w}.npy'),
+                add_rolling_features(train_df, SENSOR_COLS, w)[cols].to_numpy(np.float32))
+        np.save(os.path.join(out, f'test_roll{w}.npy'),
+                add_rolling_features(test_df, SENSOR_COLS, w)[cols].to_numpy(np.float32)[last])
+        meta['windows'].append(w)
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return out
+
+
+class CachedFeatures:
+    # memory-mapped view of a build_cache() directory
+    def __init__(self, path):
+        self.path = path
+        self._arrays = {}
+
+    def _load(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+        return self._arrays[name]
+
+    def matrix(self, window, sensors, test=False):
+        prefix = 'test_' if test else ''
+        idx = [SENSOR_COLS.index(c) for c in SENSOR_SETS[sensors]]
+        blocks = [self._load(prefix + 'sensors')[:, idx]]
+        if window:
+            blocks.append(self._load(f'{prefix}roll{window}')[:, idx])
+        return np.hstack(blocks).astype(np.float64)
+
+    def target(self, cap, test=False):
+        if test:
+            return self._load('test_rul').astype(np.float64)
+        return np.minimum(self._load('rul'), cap).astype(np.float64)
+
+    def groups(self):
+        return self._load('units')
+
+# ========== Evaluation ==========
+
+_DATA = None
+
+
+def _init_worker(cache_path):
+    global _DATA
+    _DATA = CachedFeatures(cache_path)
+    # one process per core; keep BLAS/OpenMP inside each one single-threaded
+    threadpool_limits(1)
+
+
+def evaluate_config(cfg, n_folds=5):
+    X = _DATA.matrix(cfg['window'], cfg['sensors'])
+    y = _DATA.target(cfg['cap'])
+    rmses, maes = [], []
+    start = time.perf_counter()
+    for tr, va in GroupKFold(n_splits=n_folds).split(X, y, _DATA.groups()):
+        scaler = MinMaxScaler().fit(X[tr])
+        model = make_model(cfg).fit(scaler.transform(X[tr]), y[tr])
+        pred = model.predict(scaler.transform(X[va]))
+        rmses.append(np.sqrt(mean_squared_error(y[va], pred)))
+        maes.append(mean_absolute_error(y[va], pred))
+    return {**cfg, 'cv_rmse': float(np.mean(rmses)), 'cv_rmse_std': float(np.std(rmses)),
+            'cv_mae': float(np.mean(maes)), 'fit_s': time.perf_counter() - start}
+
+
+def refit_and_test(cfg, data):
+    # fit the configuration on every training engine and score the test engines' last cycle
+    X, y = data.matrix(cfg['window'], cfg['sensors']), data.target(cfg['cap'])
+    scaler = MinMaxScaler().fit(X)
+    model = make_model(cfg).fit(scaler.transform(X), y)
+    pred = model.predict(scaler.transform(data.matrix(cfg['window'], cfg['sensors'], test=True)))
+    y_test = data.target(cfg['cap'], test=True)
+    return np.sqrt(mean_squared_error(y_test, pred)), mean_absolute_error(y_test, pred)
+
+# ========== Checkpointed Sweep ==========
+
+def load_results(path):
+    results = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by an interrupted run
+                results[r['key']] = r
+    return results
+
+
+def run_search(configs, cache_path, subset, out_path=RESULTS_FILE, n_folds=5, jobs=None):
+    key = lambda c: config_key(c, subset, n_folds)
+    done = load_results(out_path)
+    todo = [c for c in configs if key(c) not in done]
+    print(f"[Search] {len(configs)} configurations: {len(configs) - len(todo)} already in {out_path}, "
+          f"{len(todo)} to run")
+    if todo:
+        with open(out_path, 'a') as f, ProcessPoolExecutor(jobs, initializer=_init_worker,
+                                                           initargs=(cache_path,)) as pool:
+            futures = {pool.submit(evaluate_config, c, n_folds): c for c in todo}
+            for i, fut in enumerate(as_completed(futures), 1):
+                cfg = futures[fut]
+                try:
+                    r = fut.result()
+                except Exception as e:
+                    # not checkpointed, so the next run retries it
+                    print(f"[Search] {i}/{len(todo)} FAILED {key(cfg)}: {e}")
+                    continue
+                r['key'] = key(cfg)
+                f.write(json.dumps(r) + "\n")
+                f.flush()
+                done[r['key']] = r
+                print(f"[Search] {i}/{len(todo)} CV RMSE {r['cv_rmse']:.3f} ± {r['cv_rmse_std']:.3f} "
+                      f"({r['fit_s']:.1f}s) {r['key']}")
+    wanted = {key(c) for c in configs}
+    return sorted((r for k, r in done.items() if k in wanted), key=lambda r: r['cv_rmse'])
+
+
+def print_leaderboard(results, top=10):
+    print(f"\n{'rank':>4}  {'cv_rmse':>8}  {'± std':>6}  {'cv_mae':>7}  configuration")
+    for i, r in enumerate(results[:top], 1):
+        params = {k: v for k, v in r.items()
+                  if k not in ('key', 'cv_rmse', 'cv_rmse_std', 'cv_mae', 'fit_s')}
+        print(f"{i:>4}  {r['cv_rmse']:>8.3f}  {r['cv_rmse_std']:>6.3f}  {r['cv_mae']:>7.3f}  {params}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel, resumable hyperparameter search for RUL models")
+    parser.add_argument("--subset", default="FD001", choices=["FD001", "FD002", "FD003", "FD004"])
+    parser.add_argument("--models", nargs="+", default=["linear", "svr", "rf"], choices=list(MODEL_GRIDS))
+    parser.add_argument("--windows", nargs="+", type=int, default=DATA_GRID['window'],
+                        help="rolling-mean windows to try (0 = raw sensors only)")
+    parser.add_argument("--caps", nargs="+", type=int, default=DATA_GRID['cap'], help="RUL caps to try")
+    parser.add_argument("--sensors", nargs="+", default=DATA_GRID['sensors'], choices=list(SENSOR_SETS))
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--n-iter", type=int, default=30, help="configurations sampled by --search random")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--folds", type=int, default=5, help="engine-grouped CV folds")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default=None, help=f"checkpoint/results JSONL (default: <subset>_{RESULTS_FILE})")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--refit-best", action="store_true", help="refit the best configuration and score the test set")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    cache_path = build_cache(args.subset, args.windows)
+    print(f"[Search] features cached in {cache_path} ({time.perf_counter() - t0:.1f}s)")
+
+    configs = config_grid(args.models, args.windows, args.caps, args.sensors)
+    if args.search == "random" and args.n_iter < len(configs):
+        configs = random.Random(args.seed).sample(configs, args.n_iter)
+
+    out = args.out or f"{args.subset}_{RESULTS_FILE}"
+    results = run_search(configs, cache_path, args.subset, out, args.folds, args.jobs)
+    print_leaderboard(results, args.top)
+
+    if args.refit_best and results:
+        best = {k: v for k, v in results[0].items()
+                if k not in ('key', 'cv_rmse', 'cv_rmse_std', 'cv_mae', 'fit_s')}
+        rmse, mae = refit_and_test(best, CachedFeatures(cache_path))
+        print(f"\nBest configuration on the test set → RMSE: {rmse:.3f}, MAE: {mae:.3f}")
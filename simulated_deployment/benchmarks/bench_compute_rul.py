@@ -0,0 +1,51 @@
+# bench_compute_rul.py
+# Compares the old row-wise compute_rul against the groupby-transform version
+# on the FD001 training set replicated to larger fleet sizes.
+#   cd simulated_deployment/benchmarks && python bench_compute_rul.py
+import sys
+import os
+import time
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from build.data_loader import load_data, compute_rul
+
+DATA = "../../dataset/CMAPSSData/"
+
+
+# the previous implementation, kept here as the reference
+def compute_rul_rowwise(train_df, test_df, rul_df, cap=165):
+    max_cycle = train_df.groupby('unit_number')['time_in_cycles'].max()
+    train_df['RUL'] = train_df.apply(
+        lambda r: min(max_cycle[r.unit_number] - r.time_in_cycles, cap),
+        axis=1
+    )
+    last = test_df.groupby('unit_number').last().reset_index()
+    last['RUL'] = rul_df.values
+    return train_df, last
+
+
+def replicate(df, times):
+    # copies of the fleet with fresh engine ids
+    n_units = df.unit_number.max()
+    parts = [df.assign(unit_number=df.unit_number + k * n_units) for k in range(times)]
+    return pd.concat(parts, ignore_index=True)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+if __name__ == "__main__":
+    train, test, rul = load_data(DATA + "train_FD001.txt", DATA + "test_FD001.txt", DATA + "RUL_FD001.txt")
+
+    print(f"{'rows':>9} │ {'row-wise s':>10} │ {'vectorized s':>12} │ {'speedup':>7} │ identical")
+    for times in (1, 2, 4, 8):
+        df = replicate(train, times)
+        t_old, (old, _) = timed(compute_rul_rowwise, df.copy(), test, rul)
+        t_new, (new, _) = timed(compute_rul, df.copy(), test, rul)
+        same = old['RUL'].equals(new['RUL'])
+        print(f"{len(df):>9} │ {t_old:>10.3f} │ {t_new:>12.4f} │ {t_old/t_new:>6.0f}x │ {same}")
@@ -0,0 +1,73 @@
+# bench_features.py
+# Compares the DataFrame feature path (compute_rul + add_rolling_features + prepare_datasets)
+# with the array builder (prepare_matrix_datasets) on the FD001 fleet replicated to larger
+# sizes: wall time, peak traced memory, and the largest difference in the training matrix.
+#   cd simulated_deployment/benchmarks && python bench_features.py [--replicate 1 4 16]
+import sys
+import os
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from build.data_loader import (load_subset_arrays, load_subset_rul, compute_rul, _frame,
+                               COLUMN_NAMES, VALUE_COLS)
+from build.engine_index import EngineIndex
+from build.features import add_rolling_features, prepare_datasets, prepare_matrix_datasets
+
+SENSOR_COLS = [c for c in COLUMN_NAMES if 'sensor_measurement' in c]
+
+
+def replicate(ids, values, times):
+    # copies of the fleet with fresh engine ids, still grouped by engine
+    n_units = ids[:, 0].max()
+    ids = np.concatenate([ids + np.array([k * n_units, 0], dtype=np.int32) for k in range(times)])
+    return ids, np.concatenate([values] * times)
+
+
+def frame_path(train, test, rul):
+    train_df, test_df = _frame(*train), _frame(*test)
+    train_df, test_df = compute_rul(train_df, test_df, rul.to_frame())
+    train_df = add_rolling_features(train_df, SENSOR_COLS, window=20)
+    test_df = add_rolling_features(test_df, SENSOR_COLS, window=20)
+    return prepare_datasets(train_df, test_df, SENSOR_COLS + [f"{c}_roll20" for c in SENSOR_COLS])
+
+
+def matrix_path(train, test, rul):
+    return prepare_matrix_datasets((*train, EngineIndex.from_units(train[0][:, 0])),
+                                   (*test, EngineIndex.from_units(test[0][:, 0])),
+                                   rul, VALUE_COLS, SENSOR_COLS, window=20)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn(*args)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replicate", type=int, nargs="+", default=[1, 4, 16],
+                        help="stack the training fleet N times (one row of output per N)")
+    args = parser.parse_args()
+
+    import pandas as pd
+    train = [np.array(a) for a in load_subset_arrays(["FD001"], 'train')]
+    test = [np.array(a) for a in load_subset_arrays(["FD001"], 'test')]
+    rul = pd.Series(load_subset_rul(["FD001"]))
+
+    print(f"{'rows':>9} │ {'frame s':>8} │ {'frame MiB':>9} │ {'matrix s':>8} │ {'matrix MiB':>10} │ "
+          f"{'speedup':>7} │ max |ΔX_train|")
+    for times in args.replicate:
+        tr = replicate(*train, times)
+        t_old, m_old, old = measure(frame_path, tr, test, rul)
+        t_new, m_new, new = measure(matrix_path, tr, test, rul)
+        diff = np.abs(old[0].to_numpy(np.float64) - new[0].to_numpy(np.float64)).max()
+        print(f"{len(tr[0]):>9} │ {t_old:>8.3f} │ {m_old:>9.1f} │ {t_new:>8.3f} │ {m_new:>10.1f} │ "
+              f"{t_old / t_new:>6.1f}x │ {diff:.2e}")
@@ -0,0 +1,170 @@
+# bench_pipeline.py
+# Replays CMAPSS test engines through the deploy/pipeline.py producer → consumer path at a
+# controlled arrival rate and records throughput, end-to-end latency percentiles, queue
+# depth over time and peak RSS. Each invocation benchmarks one configuration and writes a
+# JSON result; --compare checks it against an earlier result file.
+#   cd simulated_deployment/benchmarks
+#   python bench_pipeline.py --mode batch --engine numpy --replicate 10 --out results/batch_numpy.json
+#   python bench_pipeline.py ... --compare results/batch_numpy.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+import sklearn
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+sys.path.append(os.path.join(HERE, '..', 'deploy'))
+
+import pipeline
+import instrument
+from predlog import BinaryLogWriter, JsonlLogWriter
+
+RESULTS_DIR = os.path.join(HERE, "results")
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux and bytes on macOS; children covers the process-pool workers
+    unit = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    return {"main": own / 2**20, "max_child": children / 2**20}
+
+
+def git_rev():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sample_queue(samples, stop, interval):
+    t0 = time.perf_counter()
+    while not stop.is_set():
+        samples.append((round(time.perf_counter() - t0, 4), pipeline.Q.qsize()))
+        stop.wait(interval)
+
+
+def run(args):
+    pipeline.ENGINE = args.engine
+    pipeline.COMPACT_MODEL = args.model == "compact"
+    pipeline.CONSUMER_DELAY = 0.0
+    pipeline.VERBOSE = False
+    pipeline.Q.configure(args.queue_size, args.queue_policy)
+    instrument.enable(args.instrument)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    if args.log_format == "binary":
+        pipeline.LOG = BinaryLogWriter(os.path.join(RESULTS_DIR, "bench_predictions.bin"), truncate=True)
+    else:
+        pipeline.LOG = JsonlLogWriter(os.path.join(RESULTS_DIR, "bench_predictions.log"), truncate=True)
+
+    n_readers, readers = pipeline.start_consumers(args.backend, args.mode, args.workers,
+                                         args.batch_size, args.batch_timeout_ms)
+    # let workers finish loading the model before the clock starts
+    time.sleep(args.warmup)
+
+    depth, stop = [], threading.Event()
+    sampler = threading.Thread(target=sample_queue, args=(depth, stop, args.sample_interval), daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    pipeline.producer(args.subsets, rolling_window=True, n_consumers=n_readers,
+                      rate=args.rate, replicate=args.replicate, order=args.order,
+                      cycle_rate=args.cycle_rate, seed=args.seed)
+    pipeline.Q.join()
+    wall = time.perf_counter() - start
+    for t in readers:
+        t.join()
+    stop.set()
+    sampler.join()
+    pipeline.LOG.close()
+    rss = peak_rss_mb()  # before any other subprocess is spawned
+
+    d = np.array([q for _, q in depth]) if depth else np.zeros(1)
+    return {
+        "config": dict(vars(args)),
+        "env": {"git_rev": git_rev(), "python": platform.python_version(), "numpy": np.__version__,
+                "sklearn": sklearn.__version__, "machine": platform.machine(), "cpus": os.cpu_count(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "metrics": pipeline.summarize_stats(wall) | {
+            "queue_depth_max": int(d.max()), "queue_depth_mean": float(d.mean()),
+            "peak_rss_mb": rss},
+        "queue_depth": depth,
+        "stages": instrument.snapshot()["workers"] if args.instrument else None,
+    }
+
+
+def compare(result, baseline_path, max_regression):
+    # returns False if throughput or tail latency got worse by more than max_regression
+    with open(baseline_path) as f:
+        base = json.load(f)["metrics"]
+    cur = result["metrics"]
+    ok = True
+    for key, higher_is_better in (("records_per_s", True), ("e2e_p50_ms", False),
+                                  ("e2e_p95_ms", False), ("e2e_p99_ms", False)):
+        if key not in base or key not in cur:
+            continue
+        change = (cur[key] - base[key]) / base[key] if base[key] else 0.0
+        worse = -change if higher_is_better else change
+        flag = "REGRESSION" if worse > max_regression else ""
+        ok &= not flag
+        print(f"[Compare] {key:<14} {base[key]:>10.2f} → {cur[key]:>10.2f} ({change:+.1%}) {flag}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput/latency benchmark for the simulated deployment")
+    parser.add_argument("--subsets", nargs="+", default=["FD001", "FD003"],
+                        choices=["FD001", "FD002", "FD003", "FD004"])
+    parser.add_argument("--replicate", type=int, default=1, help="copies of the fleet (synthetic engines)")
+    parser.add_argument("--rate", type=float, default=None, help="arrival rate in records/sec (default: unpaced)")
+    parser.add_argument("--order", choices=["random", "round-robin", "timestamp"], default="random",
+                        help="engine interleaving policy (see deploy/replay.py)")
+    parser.add_argument("--cycle-rate", type=float, default=None,
+                        help="fleet cycles/sec for --order timestamp (instead of --rate)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for --order random")
+    parser.add_argument("--mode", choices=["single", "batch"], default="batch")
+    parser.add_argument("--backend", choices=["thread", "process"], default="thread")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=pipeline.BATCH_SIZE)
+    parser.add_argument("--batch-timeout-ms", type=float, default=pipeline.BATCH_TIMEOUT_MS)
+    parser.add_argument("--queue-size", type=int, default=pipeline.QUEUE_SIZE)
+    parser.add_argument("--queue-policy", choices=["block", "drop-oldest", "coalesce"], default="block")
+    parser.add_argument("--model", choices=["svr", "compact"], default="svr")
+    parser.add_argument("--engine", choices=["sklearn", "numpy"], default="sklearn")
+    parser.add_argument("--log-format", choices=["binary", "jsonl"], default="binary")
+    parser.add_argument("--instrument", action="store_true", help="also record per-stage timers")
+    parser.add_argument("--sample-interval", type=float, default=0.05, help="queue depth sampling period (s)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds to wait for consumers to load")
+    parser.add_argument("--out", default=None, help="result JSON path (default: results/bench_<time>.json)")
+    parser.add_argument("--compare", default=None, help="baseline result JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="allowed relative slowdown before --compare fails")
+    args = parser.parse_args()
+
+    result = run(args)
+    out = args.out or os.path.join(RESULTS_DIR, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=1)
+
+    m = result["metrics"]
+    print(f"[Bench] {m['records']} records, {m['records_per_s']:.0f} rec/s, "
+          f"e2e p50/p95/p99 = {m.get('e2e_p50_ms', 0):.1f}/{m.get('e2e_p95_ms', 0):.1f}/"
+          f"{m.get('e2e_p99_ms', 0):.1f} ms, max queue depth {m['queue_depth_max']}, "
+          f"peak RSS {m['peak_rss_mb']}, dropped {m['queue']['dropped']}, coalesced {m['queue']['coalesced']}")
+    print(f"[Bench] results written to {out}")
+    if args.compare and not compare(result, args.compare, args.max_regression):
+        sys.exit(1)
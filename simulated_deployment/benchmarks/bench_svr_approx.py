@@ -0,0 +1,75 @@
+# bench_svr_approx.py
+# Exact RBF SVR vs. kernel-approximation models (Nystroem / random Fourier features
+# with a linear epsilon-insensitive regressor, in-memory and streamed with partial_fit).
+# Reports fit time, predict latency and RMSE on the FD001 validation and test splits.
+#   cd simulated_deployment/benchmarks && python bench_svr_approx.py [--replicate N]
+import sys
+import os
+import time
+import argparse
+import numpy as np
+from sklearn.svm import SVR
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from build.data_loader import load_subsets, compute_rul
+from build.features import add_rolling_features, prepare_datasets, scale_data
+from build.model import train_approx, train_approx_streaming, iter_minibatches
+
+
+def rmse(y, p):
+    return float(np.sqrt(np.mean((np.asarray(y) - p) ** 2)))
+
+
+def load_features():
+    train_df, test_df, rul_df = load_subsets(["FD001"])
+    train_df, test_df = compute_rul(train_df, test_df, rul_df)
+    sensor_cols = [c for c in train_df.columns if 'sensor_measurement' in c]
+    train_df = add_rolling_features(train_df, sensor_cols, window=20)
+    test_df  = add_rolling_features(test_df,  sensor_cols, window=20)
+    sensor_cols += [f"{c}_roll20" for c in sensor_cols]
+    X_tr, y_tr, X_va, y_va, X_te, y_te, _ = prepare_datasets(train_df, test_df, sensor_cols)
+    X_tr_s, X_va_s, X_te_s, _ = scale_data(X_tr, X_va, X_te)
+    return X_tr_s, y_tr.values, X_va_s, y_va.values, X_te_s, y_te.values
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replicate", type=int, default=1,
+                        help="stack the training set N times to see how fit time scales")
+    parser.add_argument("--skip-exact", action="store_true", help="skip the exact SVR (slow for large N)")
+    args = parser.parse_args()
+
+    X_tr, y_tr, X_va, y_va, X_te, y_te = load_features()
+    X_tr, y_tr = np.tile(X_tr, (args.replicate, 1)), np.tile(y_tr, args.replicate)
+    sample = X_tr[np.random.default_rng(0).choice(len(X_tr), 2000, replace=False)]
+
+    candidates = {
+        'nystroem-500':        lambda: train_approx(X_tr, y_tr, 'nystroem', 500),
+        'rff-1000':            lambda: train_approx(X_tr, y_tr, 'rff', 1000),
+        'nystroem-500 (sgd)':  lambda: train_approx_streaming(lambda: iter_minibatches(X_tr, y_tr),
+                                                              sample, 'nystroem', 500),
+    }
+    if not args.skip_exact:
+        candidates = {'exact SVR': lambda: SVR(C=0.1, epsilon=0.05, kernel='rbf').fit(X_tr, y_tr),
+                      **candidates}
+
+    print(f"training rows: {len(X_tr)}")
+    print(f"{'model':<20} │ {'fit s':>8} │ {'1-row ms':>8} │ {'batch µs/row':>12} │ {'val RMSE':>8} │ {'test RMSE':>9}")
+    for name, fit in candidates.items():
+        t0 = time.perf_counter()
+        model = fit()
+        fit_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for row in X_te[:50]:
+            model.predict(row[None, :])
+        one_ms = (time.perf_counter() - t0) / 50 * 1000
+
+        X_big = np.tile(X_te, (20, 1))
+        t0 = time.perf_counter()
+        model.predict(X_big)
+        batch_us = (time.perf_counter() - t0) / len(X_big) * 1e6
+
+        print(f"{name:<20} │ {fit_s:>8.2f} │ {one_ms:>8.3f} │ {batch_us:>12.2f} │ "
+              f"{rmse(y_va, model.predict(X_va)):>8.2f} │ {rmse(y_te, model.predict(X_te)):>9.2f}")
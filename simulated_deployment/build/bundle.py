@@ -0,0 +1,117 @@
+# bundle.py
+# Inference bundle: the fitted scaler and RBF model flattened into plain contiguous arrays
+# (.npz, no pickle), evaluated by a fused NumPy kernel that scales a batch, computes the
+# RBF kernel against the support vectors and applies the dual coefficients in one pass,
+# without pandas frames or sklearn input validation on the hot path.
+import argparse
+import sys
+import os
+import numpy as np
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from build.model import load_model_and_scaler, is_rbf_svr, svr_gamma, CompactRBFModel
+from build.train import prepare_features
+
+BUNDLE_FILE         = Path("../model/inference_bundle.npz")
+COMPACT_BUNDLE_FILE = Path("../model/inference_bundle_compact.npz")
+
+def _model_arrays(model, X_train=None):
+    # SVR and CompactRBFModel both reduce to (support vectors, coefficients, intercept, gamma)
+    if is_rbf_svr(model):
+        return model.support_vectors_, model.dual_coef_[0], model.intercept_[0], svr_gamma(model, X_train)
+    if isinstance(model, CompactRBFModel):
+        return model.support_vectors_, model.coef_, model.intercept_, model.gamma
+    raise ValueError(f"only an RBF SVR or CompactRBFModel can be bundled, not {type(model).__name__} "
+                     "(train with --model svr)")
+
+def _scaler_arrays(scaler):
+    # MinMaxScaler, or ConditionScaler with one row of min/scale per operating condition
+    names = list(scaler.feature_names_in_)
+    if hasattr(scaler, 'setting_idx_'):
+        out = {'min': scaler.min_, 'scale': scaler.scale_,
+               'feature_idx': np.asarray(scaler.feature_idx_), 'setting_idx': np.asarray(scaler.setting_idx_),
+               'settings_min': scaler.settings_min_, 'settings_range': scaler.settings_range_}
+        if scaler.n_conditions > 1:
+            out['centroids'] = scaler.centroids_
+        return names, out
+    return names, {'min': scaler.min_[None, :], 'scale': scaler.scale_[None, :],
+                   'feature_idx': np.arange(len(names))}
+
+def export_bundle(model, scaler, path=BUNDLE_FILE, X_train=None):
+    # X_train: scaled training rows, only needed for an SVR saved with gamma='scale'
+    sv, coef, intercept, gamma = _model_arrays(model, X_train)
+    names, scal = _scaler_arrays(scaler)
+    # written to a temp file and renamed, like the joblib models (see model._dump)
+    tmp = Path(path).with_name(Path(path).name + ".tmp")
+    with open(tmp, 'wb') as f:
+        np.savez(f, feature_names=np.asarray(names), support_vectors=sv, coef=coef,
+                 intercept=np.float64(intercept), gamma=np.float64(gamma), **scal)
+    os.replace(tmp, path)
+
+class InferenceBundle:
+    def __init__(self, path=BUNDLE_FILE, dtype=np.float64, chunk=256):
+        z = np.load(path)
+        self.dtype = np.dtype(dtype)
+        self.chunk = chunk
+        self.feature_names = [str(n) for n in z['feature_names']]
+        self.feature_idx = z['feature_idx']
+        self.setting_idx = z['setting_idx'] if 'setting_idx' in z else None
+        self.centroids = z['centroids'] if 'centroids' in z else None
+        if self.centroids is not None:
+            self.settings_min, self.settings_range = z['settings_min'], z['settings_range']
+        self.min = np.ascontiguousarray(z['min'], dtype=self.dtype)
+        self.scale = np.ascontiguousarray(z['scale'], dtype=self.dtype)
+        self.sv = np.ascontiguousarray(z['support_vectors'], dtype=self.dtype)
+        self.sv_sq = (self.sv ** 2).sum(axis=1)
+        self.coef = np.ascontiguousarray(z['coef'], dtype=self.dtype)
+        self.intercept = float(z['intercept'])
+        self.gamma = self.dtype.type(z['gamma'])
+        self.n_support = len(self.sv)
+
+    def _conditions(self, X):
+        if self.centroids is None:
+            return 0
+        s = (X[:, self.setting_idx] - self.settings_min) / self.settings_range
+        return ((s[:, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+
+    def predict(self, X):
+        # X: (n, len(feature_names)) raw features in feature_names order
+        X = np.asarray(X)
+        cond = self._conditions(X)
+        out = np.empty(len(X))
+        # chunked so the (rows x support vectors) kernel block stays cache-sized
+        for i in range(0, len(X), self.chunk):
+            c = cond if np.isscalar(cond) else cond[i:i + self.chunk]
+            Z = X[i:i + self.chunk, self.feature_idx].astype(self.dtype) * self.scale[c] + self.min[c]
+            d = (Z ** 2).sum(axis=1)[:, None] - 2.0 * (Z @ self.sv.T) + self.sv_sq[None, :]
+            np.maximum(d, 0.0, out=d)
+            d *= -self.gamma
+            np.exp(d, out=d)
+            out[i:i + self.chunk] = d @ self.coef + self.intercept
+        return out
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Export the trained model + scaler as a NumPy inference bundle")
+    parser.add_argument("--compact", action="store_true", help="bundle the compressed model instead")
+    parser.add_argument("--subsets", nargs="+", default=["FD001"],
+                        choices=["FD001", "FD002", "FD003", "FD004"], help="data used for the check (and the training subsets of an SVR saved with gamma='scale')")
+    parser.add_argument("--check-rows", type=int, default=500, help="rows used to verify against sklearn")
+    args = parser.parse_args()
+
+    model, scaler = load_model_and_scaler(args.compact)
+    path = COMPACT_BUNDLE_FILE if args.compact else BUNDLE_FILE
+    X_tr = prepare_features(args.subsets)[0][list(scaler.feature_names_in_)].to_numpy()
+    try:
+        export_bundle(model, scaler, path, scaler.transform(X_tr))
+    except ValueError as e:
+        parser.error(str(e))
+
+    # verify against the sklearn path on real training rows
+    X = X_tr[:args.check_rows]
+    ref = model.predict(scaler.transform(X))
+    for dtype in (np.float64, np.float32):
+        err = np.abs(InferenceBundle(path, dtype).predict(X) - ref).max()
+        print(f"[Bundle] {np.dtype(dtype).name}: max |Δ| vs sklearn = {err:.2e}")
+    print(f"Inference bundle saved to {path}")
@@ -0,0 +1,76 @@
+# compress.py
+# Shrinks the trained SVR to a reduced set of support vectors and exports it next to
+# svr_model.joblib. The budget grows until the compact model's RMSE over every row of the
+# validation engines is within --tol of the full model's.
+import argparse
+import time
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from build.train import prepare_features
+from build.model import (load_model_and_scaler, is_rbf_svr, svr_gamma, reduce_svr, save_compact_model,
+                         CompactRBFModel)
+
+def rmse(y, p):
+    return float(np.sqrt(np.mean((np.asarray(y) - p) ** 2)))
+
+def compress_svr(svr, X_train, X_val, y_val, tol=1.0, budgets=None, n_fit=5000, seed=42):
+    if not is_rbf_svr(svr):
+        raise ValueError(f"only an RBF SVR can be compressed, not {type(svr).__name__} "
+                         "(train with --model svr)")
+    gamma = svr_gamma(svr, X_train)
+    # distil on a sample of training rows
+    rng = np.random.default_rng(seed)
+    X_fit = X_train[rng.choice(len(X_train), min(n_fit, len(X_train)), replace=False)]
+    full = rmse(y_val, svr.predict(X_val))
+    if budgets is None:
+        budgets = [b for b in (25, 50, 100, 200, 400, 800, 1600, 3200) if b < len(svr.support_vectors_)]
+    if not budgets:
+        # already at or below the smallest budget: export the SVR's own support vectors
+        model = CompactRBFModel(svr.support_vectors_, svr.dual_coef_[0], svr.intercept_[0], gamma)
+        print(f"[Compress] only {model.n_support} SVs; exporting them unreduced.")
+        return model, rmse(y_val, model.predict(X_val)), full
+
+    for budget in budgets:
+        model = reduce_svr(svr, X_fit, gamma, budget)
+        score = rmse(y_val, model.predict(X_val))
+        print(f"[Compress] {budget:>5} SVs → val RMSE {score:.3f} (full {full:.3f}, "
+              f"{len(svr.support_vectors_)} SVs)")
+        if score <= full + tol:
+            return model, score, full
+    return model, score, full
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Export a reduced-support-vector copy of the SVR")
+    parser.add_argument("--subsets", nargs="+", default=["FD001"],
+                        choices=["FD001", "FD002", "FD003", "FD004"])
+    parser.add_argument("--tol", type=float, default=1.0,
+                        help="allowed validation RMSE increase over the full model")
+    args = parser.parse_args()
+
+    svr, scaler = load_model_and_scaler()
+    # the tolerance is scored on every row of the validation engines (the sampled one-row-per-
+    # engine split is only ~10 rows for FD001)
+    X_tr, y_tr, X_va, y_va, X_te, y_te, _ = prepare_features(args.subsets, val_all_rows=True)
+    cols = list(scaler.feature_names_in_)
+    X_tr_s, X_va_s, X_te_s = (scaler.transform(X[cols]) for X in (X_tr, X_va, X_te))
+
+    try:
+        model, score, full = compress_svr(svr, X_tr_s, X_va_s, y_va, args.tol)
+    except ValueError as e:
+        parser.error(str(e))
+    if score > full + args.tol:
+        print(f"[Compress] no budget met the tolerance; keeping the largest ({model.n_support} SVs).")
+    save_compact_model(model)
+
+    # per-row latency of both models on the test rows
+    for name, m in (("full", svr), ("compact", model)):
+        t0 = time.perf_counter()
+        for row in X_te_s:
+            m.predict(row[None, :])
+        ms = (time.perf_counter() - t0) / len(X_te_s) * 1000
+        print(f"[Compress] {name:>7}: test RMSE {rmse(y_te, m.predict(X_te_s)):.3f}, {ms:.3f} ms/prediction")
+    print("Compact model saved.")
@@ -1,27 +1,284 @@
 # data_loader.py
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
 import pandas as pd
 
+from build.engine_index import EngineIndex, engine_bounds
+
 COLUMN_NAMES = (
     ['unit_number', 'time_in_cycles',
      'operational_setting_1', 'operational_setting_2', 'operational_setting_3']
     + [f'sensor_measurement_{i}' for i in range(1,22)]
 )
 
-def load_data(train_path, test_path, rul_path):
-    train = pd.read_csv(train_path, sep=' ', header=None).drop(columns=[26,27])
-    train.columns = COLUMN_NAMES
-    test  = pd.read_csv(test_path,  sep=' ', header=None).drop(columns=[26,27])
-    test.columns  = COLUMN_NAMES
-    rul_df = pd.read_csv(rul_path, header=None)
+ID_COLS      = COLUMN_NAMES[:2]
+SETTING_COLS = COLUMN_NAMES[2:5]
+VALUE_COLS   = COLUMN_NAMES[2:]
+
+DATA_DIR = "../../dataset/CMAPSSData/"
+# engine ids are offset per subset so they stay unique when subsets are combined
+# (FD001 keeps 1..100, FD002 becomes 1001.., FD003 2001.., FD004 3001..)
+UNIT_OFFSET = 1000
+
+# Parsed files are cached as .npy arrays in a .cache/ folder next to the text files:
+# ids, values and the per-engine row index (build/engine_index.py). The parser streams the
+# text file in chunks straight into the memory-mapped .npy files, so building the cache
+# needs memory for a chunk, not the whole file.
+# A cache entry is reused while the source's size+mtime are unchanged; if the mtime moved,
+# the content hash decides whether the entry is still valid.
+CACHE_DIR = '.cache'
+PARSE_CHUNK_ROWS = 1 << 16
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_paths(path):
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    stem = os.path.join(cache_dir, os.path.splitext(os.path.basename(path))[0])
+    return cache_dir, stem
+
+
+def _cached_arrays(path, parse, names):
+    # returns {name: array}, parsing `path` with `parse` only when the cache is missing or stale
+    cache_dir, stem = _cache_paths(path)
+    meta_file = stem + '.meta.json'
+    st = os.stat(path)
+    key = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+    meta = None
+    if os.path.exists(meta_file):
+        with open(meta_file) as f:
+            meta = json.load(f)
+    if meta is not None and all(os.path.exists(f'{stem}.{n}.npy') for n in names):
+        fresh = meta['size'] == key['size'] and meta['mtime_ns'] == key['mtime_ns']
+        if not fresh and meta['size'] == key['size'] and meta['sha256'] == _sha256(path):
+            # touched but not changed: keep the arrays, refresh the key
+            fresh = True
+            meta.update(key)
+            _write_json(meta_file, meta)
+        if fresh:
+            return {n: np.load(f'{stem}.{n}.npy', mmap_mode='r') for n in names}
+
+    # the parser fills memory-mapped temp files, which replace the cache entry once complete
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = lambda n: f'{stem}.{n}.tmp.npy'
+    arrays = parse(path, lambda n, shape, dtype: np.lib.format.open_memmap(tmp(n), 'w+', dtype, shape))
+    for n in names:
+        arrays[n].flush()
+    del arrays
+    for n in names:
+        os.replace(tmp(n), f'{stem}.{n}.npy')
+    _write_json(meta_file, {**key, 'sha256': _sha256(path)})
+    return {n: np.load(f'{stem}.{n}.npy', mmap_mode='r') for n in names}
+
+
+def _in_memory(name, shape, dtype):
+    return np.empty(shape, dtype)
+
+
+def _write_json(path, obj):
+    with open(path + '.tmp', 'w') as f:
+        json.dump(obj, f)
+    os.replace(path + '.tmp', path)
+
+
+def _count_rows(path):
+    # non-empty lines, i.e. the rows read_csv returns
+    n, prev = 0, 10
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            b = np.frombuffer(block, dtype=np.uint8)
+            n += int(((b != 10) & (b != 13) & (np.r_[prev, b[:-1]] == 10)).sum())
+            prev = b[-1]
+    return n
+
+
+def _parse_cmapss(path, alloc=_in_memory):
+    # whitespace-separated, two trailing blanks per line; ids as int32, readings as float32.
+    # Rows are read PARSE_CHUNK_ROWS at a time into arrays from alloc(name, shape, dtype),
+    # and the engine index is built from the runs of unit numbers as they arrive. Rows end
+    # up in (unit, cycle) order; the files already are, otherwise they're sorted afterwards.
+    n = _count_rows(path)
+    ids = alloc('ids', (n, 2), np.int32)
+    values = alloc('values', (n, len(VALUE_COLS)), np.float32)
+    reader = pd.read_csv(path, sep=' ', header=None, usecols=range(len(COLUMN_NAMES)),
+                         dtype={i: (np.int32 if i < 2 else np.float32) for i in range(len(COLUMN_NAMES))},
+                         chunksize=PARSE_CHUNK_ROWS)
+    row, last = 0, None
+    units, starts = [], []
+    ordered = True
+    for chunk in reader:
+        k = len(chunk)
+        if row + k > n:
+            raise ValueError(f"{path}: more rows than lines")
+        c_ids = chunk.iloc[:, :2].to_numpy(np.int32)
+        ids[row:row + k] = c_ids
+        values[row:row + k] = chunk.iloc[:, 2:].to_numpy(np.float32)
+        # each row against the one before it (the first row of the file starts an engine)
+        prev = c_ids[:1] - [1, 0] if last is None else last[None, :]
+        pair = np.r_[prev, c_ids].astype(np.int64)
+        pu, cu = pair[:-1], pair[1:]
+        new = pu[:, 0] != cu[:, 0]
+        ordered &= bool(np.all((pu[:, 0] < cu[:, 0]) | (~new & (pu[:, 1] < cu[:, 1]))))
+        pos = np.flatnonzero(new)
+        units.extend(cu[pos, 0].tolist())
+        starts.extend((row + pos).tolist())
+        row += k
+        last = c_ids[-1]
+    if row != n:
+        raise ValueError(f"{path}: expected {n} rows, read {row}")
+
+    if not ordered:
+        _sort_rows(ids, values)
+        starts = engine_bounds(ids[:, 0])[0]
+        units = ids[starts, 0]
+    index = alloc('index', (len(units), 3), np.int64)
+    index[:, 0] = units
+    index[:, 1] = starts
+    index[:, 2] = np.r_[starts[1:], n]
+    return {'ids': ids, 'values': values, 'index': index}
+
+
+def _sort_rows(ids, values, block=PARSE_CHUNK_ROWS):
+    # puts ids/values in (unit, cycle) order in place: only the ids and the order are held
+    # in memory, the values are staged in a temporary file and gathered back block by block
+    order = np.lexsort((ids[:, 1], ids[:, 0]))
+    ids[:] = np.asarray(ids)[order]
+    with tempfile.TemporaryFile() as f:
+        staged = np.memmap(f, dtype=values.dtype, mode='w+', shape=values.shape)
+        for i in range(0, len(values), block):
+            staged[i:i + block] = values[i:i + block]
+        for i in range(0, len(values), block):
+            values[i:i + block] = staged[order[i:i + block]]
+        del staged
+
+
+def _parse_rul(path, alloc=_in_memory):
+    rul = pd.read_csv(path, header=None, dtype=np.int32)[0].to_numpy()
+    out = alloc('rul', rul.shape, np.int32)
+    out[:] = rul
+    return {'rul': out}
+
+
+def _cmapss_arrays(path, use_cache=True):
+    return _cached_arrays(path, _parse_cmapss, ('ids', 'values', 'index')) if use_cache else _parse_cmapss(path)
+
+
+def _frame(ids, values):
+    df = pd.DataFrame(np.array(values), columns=VALUE_COLS)
+    df.insert(0, ID_COLS[1], np.array(ids[:, 1]))
+    df.insert(0, ID_COLS[0], np.array(ids[:, 0]))
+    return df
+
+
+def load_cmapss_file(path, use_cache=True):
+    arrays = _cmapss_arrays(path, use_cache)
+    return _frame(arrays['ids'], arrays['values'])
+
+
+def load_rul_file(path, use_cache=True):
+    arrays = _cached_arrays(path, _parse_rul, ('rul',)) if use_cache else _parse_rul(path)
+    return pd.DataFrame({0: np.array(arrays['rul'])})
+
+
+def load_engine_index(path, use_cache=True):
+    # EngineIndex of the rows load_cmapss_file returns for `path`
+    return EngineIndex.from_array(_cmapss_arrays(path, use_cache)['index'])
+
+
+def load_data(train_path, test_path, rul_path, use_cache=True):
+    train  = load_cmapss_file(train_path, use_cache)
+    test   = load_cmapss_file(test_path, use_cache)
+    rul_df = load_rul_file(rul_path, use_cache)
     return train, test, rul_df
 
-def compute_rul(train_df, test_df, rul_df):
-    # train RUL
-    max_cycle = train_df.groupby('unit_number')['time_in_cycles'].max()
-    train_df['RUL'] = train_df.apply(
-        lambda r: min(max_cycle[r.unit_number] - r.time_in_cycles, 165),
-        axis=1
-    )
+def subset_paths(subset, data_dir=DATA_DIR):
+    return (os.path.join(data_dir, f'train_{subset}.txt'),
+            os.path.join(data_dir, f'test_{subset}.txt'),
+            os.path.join(data_dir, f'RUL_{subset}.txt'))
+
+def load_subsets(subsets, data_dir=DATA_DIR, use_cache=True, train=True):
+    # concatenated train/test/RUL frames for several FD00x subsets;
+    # with train=False only the test and RUL files are read and train is None
+    trains, tests, ruls = [], [], []
+    for subset in subsets:
+        train_path, test_path, rul_path = subset_paths(subset, data_dir)
+        offset = (int(subset[-3:]) - 1) * UNIT_OFFSET
+        if train:
+            df = load_cmapss_file(train_path, use_cache)
+            df['unit_number'] += offset
+            trains.append(df)
+        df = load_cmapss_file(test_path, use_cache)
+        df['unit_number'] += offset
+        tests.append(df)
+        ruls.append(load_rul_file(rul_path, use_cache))
+    train_df = pd.concat(trains, ignore_index=True) if train else None
+    return train_df, pd.concat(tests, ignore_index=True), pd.concat(ruls, ignore_index=True)
+
+def iter_engine_chunks(subsets, engines_per_chunk=50, data_dir=DATA_DIR, use_cache=True, seed=None):
+    # Training frames a group of whole engines at a time, for out-of-core training. The
+    # parsed arrays are memory-mapped from the cache and only the current group's rows are
+    # copied into a DataFrame, so memory is bounded by the group size, not the fleet. With
+    # a seed the groups come in shuffled order (SGD converges worse when it sees engines in
+    # file order).
+    groups = []
+    for subset in subsets:
+        offset = (int(subset[-3:]) - 1) * UNIT_OFFSET
+        arrays = _cmapss_arrays(subset_paths(subset, data_dir)[0], use_cache)
+        index = EngineIndex.from_array(arrays['index'])
+        for i in range(0, len(index), engines_per_chunk):
+            groups.append((arrays, offset, index.starts[i], index.ends[min(i + engines_per_chunk, len(index)) - 1]))
+    if seed is not None:
+        groups = [groups[i] for i in np.random.default_rng(seed).permutation(len(groups))]
+    for arrays, offset, lo, hi in groups:
+        df = _frame(arrays['ids'][lo:hi], arrays['values'][lo:hi])
+        df['unit_number'] += offset
+        yield df
+
+def load_subset_arrays(subsets, split='train', data_dir=DATA_DIR, use_cache=True):
+    # (ids, values) arrays of the train or test files of several subsets, with engine ids
+    # offset as in load_subsets; without an offset they come straight from the memory-mapped
+    # cache, uncopied
+    ids, values = [], []
+    for subset in subsets:
+        path = subset_paths(subset, data_dir)[0 if split == 'train' else 1]
+        offset = (int(subset[-3:]) - 1) * UNIT_OFFSET
+        arrays = _cmapss_arrays(path, use_cache)
+        ids.append(arrays['ids'] + np.array([offset, 0], dtype=np.int32) if offset else arrays['ids'])
+        values.append(arrays['values'])
+    if len(subsets) == 1:
+        return ids[0], values[0]
+    return np.concatenate(ids), np.concatenate(values)
+
+def load_subset_index(subsets, split='train', data_dir=DATA_DIR, use_cache=True):
+    # EngineIndex matching load_subset_arrays / the frames of load_subsets
+    return EngineIndex.concat([
+        load_engine_index(subset_paths(s, data_dir)[0 if split == 'train' else 1], use_cache)
+        .shifted(unit_offset=(int(s[-3:]) - 1) * UNIT_OFFSET)
+        for s in subsets])
+
+def load_subset_rul(subsets, data_dir=DATA_DIR, use_cache=True):
+    return np.concatenate([load_rul_file(subset_paths(s, data_dir)[2], use_cache)[0].to_numpy()
+                           for s in subsets])
+
+def add_train_rul(train_df, cap=165):
+    # cycles left before the engine's last cycle, capped
+    max_cycle = train_df.groupby('unit_number')['time_in_cycles'].transform('max')
+    train_df['RUL'] = (max_cycle - train_df['time_in_cycles']).clip(upper=cap).astype('float64')
+    return train_df
+
+def compute_rul(train_df, test_df, rul_df, cap=165):
+    # train RUL: cycles left before the engine's last cycle, capped
+    train_df = add_train_rul(train_df, cap)
     # test RUL: last cycle + provided RUL
     last = test_df.groupby('unit_number').last().reset_index()
     last['RUL'] = rul_df.values
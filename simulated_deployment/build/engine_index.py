@@ -0,0 +1,79 @@
+# engine_index.py
+# Per-engine offset index: maps each unit_number to the contiguous [start, end) row range
+# it occupies in arrays/frames whose rows are grouped by engine in cycle order. It is
+# built once when a CMAPSS file is parsed and cached next to the parsed arrays (see
+# data_loader), so splits, replay and analytics slice an engine's rows in O(1) instead of
+# scanning the unit column for it.
+import numpy as np
+
+
+def engine_bounds(units):
+    # [start, end) row range of every engine, for rows grouped by engine
+    units = np.asarray(units)
+    starts = np.flatnonzero(np.r_[True, units[1:] != units[:-1]]) if len(units) else np.zeros(0, np.int64)
+    return starts, np.r_[starts[1:], len(units)].astype(np.int64)
+
+
+class EngineIndex:
+    def __init__(self, units, starts, ends):
+        self.units = np.asarray(units, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self._pos = {u: i for i, u in enumerate(self.units.tolist())}
+        if len(self._pos) != len(self.units):
+            raise ValueError("rows are not grouped by engine")
+
+    @classmethod
+    def from_units(cls, units):
+        # raises ValueError unless the rows are grouped by engine
+        units = np.asarray(units)
+        starts, ends = engine_bounds(units)
+        return cls(units[starts], starts, ends)
+
+    # (n_engines, 3) int64 array of unit, start, end – the form cached on disk
+    @classmethod
+    def from_array(cls, arr):
+        arr = np.asarray(arr)
+        return cls(arr[:, 0], arr[:, 1], arr[:, 2])
+
+    def to_array(self):
+        return np.column_stack([self.units, self.starts, self.ends])
+
+    def __len__(self):
+        return len(self.units)
+
+    def __contains__(self, unit):
+        return unit in self._pos
+
+    @property
+    def n_rows(self):
+        return int(self.ends[-1]) if len(self) else 0
+
+    @property
+    def lengths(self):
+        return self.ends - self.starts
+
+    def rows(self, unit):
+        i = self._pos[unit]
+        return slice(int(self.starts[i]), int(self.ends[i]))
+
+    def take(self, units):
+        # row positions of the given engines, engine by engine in the given order
+        pos = np.array([self._pos[u] for u in np.asarray(units).tolist()], dtype=np.int64)
+        lengths = self.lengths[pos]
+        out_starts = np.r_[0, np.cumsum(lengths)[:-1]] if len(pos) else np.zeros(0, np.int64)
+        return np.arange(lengths.sum()) + np.repeat(self.starts[pos] - out_starts, lengths)
+
+    def shifted(self, unit_offset=0, row_offset=0):
+        return EngineIndex(self.units + unit_offset, self.starts + row_offset, self.ends + row_offset)
+
+    @staticmethod
+    def concat(indexes):
+        # index of the row-wise concatenation of the indexed arrays
+        parts, rows = [], 0
+        for idx in indexes:
+            parts.append(idx.shifted(row_offset=rows))
+            rows += idx.n_rows
+        return EngineIndex(np.concatenate([p.units for p in parts]),
+                           np.concatenate([p.starts for p in parts]),
+                           np.concatenate([p.ends for p in parts]))
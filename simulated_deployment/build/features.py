@@ -2,7 +2,16 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import MinMaxScaler
+from sklearn.cluster import KMeans
+
+from build.engine_index import EngineIndex
+
+SETTING_COLS = ['operational_setting_1', 'operational_setting_2', 'operational_setting_3']
+# FD002/FD004 run under six operating conditions, FD001/FD003 under one
+OPERATING_CONDITIONS = {'FD001': 1, 'FD002': 6, 'FD003': 1, 'FD004': 6}
+
+def n_conditions_for(subsets):
+    return max(OPERATING_CONDITIONS[s] for s in subsets)
 
 def add_rolling_features(df, sensor_cols, window=10):
     df = df.sort_values(['unit_number','time_in_cycles'])
@@ -15,29 +24,282 @@ def add_rolling_features(df, sensor_cols, window=10):
         )
     return df
 
-def prepare_datasets(train_df, test_df, sensor_cols=None, val_frac=0.1):
+def prepare_datasets(train_df, test_df, sensor_cols=None, val_frac=0.1, index=None):
+    # index: EngineIndex of train_df's rows; built here (one pass) if not given
     if sensor_cols is None:
         sensor_cols = [c for c in train_df.columns if 'sensor_measurement' in c]
+    # settings ride along so the scaler can tell which operating condition each row is in
+    feature_cols = sensor_cols + SETTING_COLS
+    frame_rows = lambda r: r
+    if index is None:
+        units = train_df.unit_number.to_numpy()
+        try:
+            index = EngineIndex.from_units(units)
+        except ValueError:
+            # rows not grouped by engine: index a stable sort of them instead
+            perm = np.argsort(units, kind='stable')
+            index = EngineIndex.from_units(units[perm])
+            frame_rows = perm.__getitem__
     # split engine IDs
     engines = train_df.unit_number.unique()
     train_ids, val_ids = train_test_split(engines, test_size=val_frac, random_state=42)
-    # train set
-    X_train = train_df[train_df.unit_number.isin(train_ids)][sensor_cols]
-    y_train = train_df[train_df.unit_number.isin(train_ids)]['RUL']
+    # train set: the training engines' rows, in frame order
+    train_part = train_df.iloc[np.sort(frame_rows(index.take(train_ids)))]
+    X_train = train_part[feature_cols]
+    y_train = train_part['RUL']
     # val: one random row per engine
-    val_rows = []
-    for uid in val_ids:
-        sub = train_df[train_df.unit_number==uid]
-        val_rows.append(sub.sample(1, random_state=42))
-    val_df = pd.concat(val_rows)
-    X_val, y_val = val_df[sensor_cols], val_df['RUL']
+    val_df = pd.concat([train_df.iloc[frame_rows(index.rows(uid))].sample(1, random_state=42)
+                        for uid in val_ids])
+    X_val, y_val = val_df[feature_cols], val_df['RUL']
     # test set
-    X_test, y_test = test_df[sensor_cols], test_df['RUL']
+    X_test, y_test = test_df[feature_cols], test_df['RUL']
     return X_train, y_train, X_val, y_val, X_test, y_test, sensor_cols
 
-def scale_data(X_train, X_val, X_test):
-    scaler = MinMaxScaler()
+# ---- Array feature builder ----
+# Same features as add_rolling_features + prepare_datasets, built straight from the
+# float32 value arrays: rows stay grouped by engine, every rolling mean comes from one
+# cumulative-sum pass with per-engine offsets, and the splits are views of one matrix
+# instead of filtered copies of a frame.
+
+def rolling_means(x, starts, window, out=None, block=8):
+    # Mean of each row and up to window-1 rows before it in the same engine (like
+    # add_rolling_features with min_periods=1). x: (n, k), rows grouped by engine in cycle
+    # order; starts: first row of each engine. Columns are centred before the float64
+    # cumulative sum so the running sums stay small, and handled `block` at a time to
+    # bound the float64 scratch space.
+    n, k = x.shape
+    row = np.arange(n)
+    lo = np.maximum(row - (window - 1), np.repeat(starts, np.diff(np.r_[starts, n])))
+    count = (row + 1 - lo)[:, None].astype(np.float64)
+    if out is None:
+        out = np.empty((n, k))
+    cs = np.empty((n + 1, min(block, k)))
+    cs[0] = 0.0
+    for j in range(0, k, block):
+        cols = slice(j, min(j + block, k))
+        c = cs[:, :cols.stop - j]
+        mean = x[:, cols].mean(axis=0, dtype=np.float64)
+        np.subtract(x[:, cols], mean, out=c[1:])
+        np.cumsum(c[1:], axis=0, out=c[1:])
+        win = c[1:]
+        np.subtract(win, c[lo], out=win)
+        win /= count
+        win += mean
+        out[:, cols] = win
+    return out
+
+def build_feature_matrix(values, starts, value_cols, sensor_cols, window=20, rows=None):
+    # float32 matrix with columns sensor_cols + their rolling means + SETTING_COLS (the
+    # prepare_datasets order). `rows` optionally reorders the input rows; engines must stay
+    # contiguous in it and `starts` refers to the reordered rows.
+    pos = {c: i for i, c in enumerate(value_cols)}
+    take = lambda cols: values[:, cols] if rows is None else values[np.ix_(rows, cols)]
+    k = len(sensor_cols)
+    feature_cols = list(sensor_cols) + [f'{c}_roll{window}' for c in sensor_cols] + SETTING_COLS
+    X = np.empty((len(values) if rows is None else len(rows), len(feature_cols)), dtype=np.float32)
+    X[:, :k] = take([pos[c] for c in sensor_cols])
+    rolling_means(X[:, :k], starts, window, out=X[:, k:2 * k])
+    X[:, 2 * k:] = take([pos[c] for c in SETTING_COLS])
+    return X, feature_cols
+
+def prepare_matrix_datasets(train, test, test_rul, value_cols, sensor_cols, window=20,
+                            val_frac=0.1, cap=165, val_all_rows=False):
+    # Array counterpart of add_rolling_features + prepare_datasets. train/test: (ids, values,
+    # EngineIndex); test_rul: RUL after each test engine's last cycle. Validation engines
+    # and rows are the ones prepare_datasets picks. The matrix is built with the training
+    # engines first, so X_train is a slice view of it; the DataFrames returned wrap the
+    # arrays without copying. With val_all_rows, validation gets every row of the validation
+    # engines instead of one sampled row each.
+    ids, values, index = train
+    engines = index.units
+    train_ids, val_ids = train_test_split(engines, test_size=val_frac, random_state=42)
+    is_val = np.isin(engines, val_ids)
+    order = np.r_[np.flatnonzero(~is_val), np.flatnonzero(is_val)]
+    lengths = index.lengths[order]
+    new_starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    rows = index.take(engines[order])
+    X, feature_cols = build_feature_matrix(values, new_starts, value_cols, sensor_cols, window, rows)
+
+    # capped cycles left before each engine's last cycle
+    cycles = ids[rows, 1]
+    last = np.repeat(cycles[new_starts + lengths - 1], lengths)
+    y = np.minimum(last - cycles, cap).astype(np.float64)
+
+    n_train = int(lengths[:(~is_val).sum()].sum())
+    # val: one random row per engine, the row DataFrame.sample(1, random_state=42) picks,
+    # in val_ids order
+    if val_all_rows:
+        val_rows = slice(n_train, None)
+    else:
+        val_pos = {e: i for i, e in enumerate(engines[order])}
+        val_rows = [new_starts[val_pos[e]] + np.random.RandomState(42).permutation(lengths[val_pos[e]])[0]
+                    for e in val_ids]
+
+    # test: features at each engine's last cycle, rolling over its full history
+    t_ids, t_values, t_index = test
+    X_t, _ = build_feature_matrix(t_values, t_index.starts, value_cols, sensor_cols, window)
+    X_test = X_t[t_index.ends - 1]
+
+    frame = lambda a: pd.DataFrame(a, columns=feature_cols, copy=False)
+    return (frame(X[:n_train]), pd.Series(y[:n_train], name='RUL'),
+            frame(X[val_rows]), pd.Series(y[val_rows], name='RUL'),
+            frame(X_test), pd.Series(np.asarray(test_rul, dtype=np.float64), name='RUL'),
+            feature_cols[:2 * len(sensor_cols)])
+
+# Min-max scaling done separately inside each operating condition. Conditions are found
+# with k-means on the (range-normalised) operational settings once at fit time; after
+# that, rows are assigned to the nearest centroid with a single vectorized distance.
+# With n_conditions=1 this is exactly sklearn's MinMaxScaler.
+class ConditionScaler:
+    def __init__(self, n_conditions=1, setting_cols=SETTING_COLS):
+        self.n_conditions = n_conditions
+        self.setting_cols = list(setting_cols)
+
+    def _split(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return X[:, self.feature_idx_], X[:, self.setting_idx_]
+
+    def assign(self, settings):
+        if self.n_conditions == 1:
+            return np.zeros(len(settings), dtype=np.intp)
+        s = (np.asarray(settings, dtype=np.float64) - self.settings_min_) / self.settings_range_
+        d = ((s[:, None, :] - self.centroids_[None, :, :]) ** 2).sum(axis=2)
+        return d.argmin(axis=1)
+
+    def fit_conditions(self, X, settings_min=None, settings_max=None):
+        # Settings normalisation and condition centroids, from rows that cover every
+        # operating condition (e.g. a sample of the whole training set). settings_min/max
+        # override X's own bounds, e.g. with the extremes seen over all chunks.
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        cols = list(self.feature_names_in_)
+        self.setting_idx_ = [cols.index(c) for c in self.setting_cols]
+        self.feature_idx_ = [i for i, c in enumerate(cols) if c not in self.setting_cols]
+        self.n_features_in_ = len(cols)
+        _, settings = self._split(X)
+
+        self.settings_min_ = settings.min(axis=0) if settings_min is None else np.asarray(settings_min, dtype=np.float64)
+        smax = settings.max(axis=0) if settings_max is None else np.asarray(settings_max, dtype=np.float64)
+        rng = smax - self.settings_min_
+        self.settings_range_ = np.where(rng == 0, 1.0, rng)
+        if self.n_conditions > 1:
+            s = (settings - self.settings_min_) / self.settings_range_
+            km = KMeans(n_clusters=self.n_conditions, n_init=10, random_state=42).fit(s)
+            self.centroids_ = km.cluster_centers_
+        self.data_min_ = np.full((self.n_conditions, len(self.feature_idx_)), np.inf)
+        self.data_max_ = np.full((self.n_conditions, len(self.feature_idx_)), -np.inf)
+        return self
+
+    def fit(self, X, y=None):
+        self.fit_conditions(X)
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        # Running per-condition min/max, for fitting one chunk at a time. With several
+        # conditions, fit_conditions must have been called first on data covering all of them.
+        if not hasattr(self, 'data_min_'):
+            if self.n_conditions > 1:
+                raise RuntimeError("call fit_conditions before partial_fit when n_conditions > 1")
+            self.fit_conditions(X)
+        feats, settings = self._split(X)
+        cond = self.assign(settings)
+        for k in range(self.n_conditions):
+            rows = feats[cond == k]
+            if not len(rows):
+                continue
+            self.data_min_[k] = np.minimum(self.data_min_[k], rows.min(axis=0))
+            self.data_max_[k] = np.maximum(self.data_max_[k], rows.max(axis=0))
+
+        # conditions without rows yet keep scale 1, offset 0
+        seen = np.isfinite(self.data_min_)
+        data_range = np.where(seen, self.data_max_ - self.data_min_, 1.0)
+        self.scale_ = 1.0 / np.where(data_range == 0, 1.0, data_range)
+        self.min_ = np.where(seen, -self.data_min_ * self.scale_, 0.0)
+        return self
+
+    def transform(self, X):
+        feats, settings = self._split(X)
+        cond = self.assign(settings)
+        return feats * self.scale_[cond] + self.min_[cond]
+
+    def fit_transform(self, X, y=None):
+        return self.fit(X).transform(X)
+
+
+def scale_data(X_train, X_val, X_test, n_conditions=1):
+    scaler = ConditionScaler(n_conditions)
     X_train_s = scaler.fit_transform(X_train)
     X_val_s   = scaler.transform(X_val)
     X_test_s  = scaler.transform(X_test)
     return X_train_s, X_val_s, X_test_s, scaler
+
+
+# Streaming counterpart of add_rolling_features: one ring buffer + running sum per engine,
+# so each new cycle updates the rolling means in O(1) instead of reprocessing history.
+# The sums follow pandas' rolling-mean arithmetic (compensated add/remove, same-value and
+# sign rules) so the output matches add_rolling_features(min_periods=1) exactly.
+class _EngineWindow:
+    __slots__ = ('buf', 'pos', 'nobs', 'sum_x', 'comp_add', 'comp_rem',
+                 'neg_ct', 'same_ct', 'prev')
+
+    def __init__(self, window, n):
+        self.buf      = np.zeros((window, n))
+        self.pos      = 0
+        self.nobs     = 0
+        self.sum_x    = np.zeros(n)
+        self.comp_add = np.zeros(n)
+        self.comp_rem = np.zeros(n)
+        self.neg_ct   = np.zeros(n, dtype=np.int64)
+        self.same_ct  = np.zeros(n, dtype=np.int64)
+        self.prev     = np.full(n, np.nan)
+
+    def push(self, x):
+        window = len(self.buf)
+        # remove the value falling out of the window
+        if self.nobs == window:
+            old = self.buf[self.pos]
+            y = -old - self.comp_rem
+            t = self.sum_x + y
+            self.comp_rem = t - self.sum_x - y
+            self.sum_x = t
+            self.neg_ct -= np.signbit(old)
+            self.nobs -= 1
+        # add the new value
+        y = x - self.comp_add
+        t = self.sum_x + y
+        self.comp_add = t - self.sum_x - y
+        self.sum_x = t
+        self.neg_ct += np.signbit(x)
+        self.same_ct = np.where(x == self.prev, self.same_ct + 1, 1)
+        self.prev = x.copy()
+        self.nobs += 1
+        self.buf[self.pos] = x
+        self.pos = (self.pos + 1) % window
+
+        mean = self.sum_x / self.nobs
+        mean = np.where((self.neg_ct == 0) & (mean < 0), 0.0, mean)
+        mean = np.where((self.neg_ct == self.nobs) & (mean > 0), 0.0, mean)
+        return np.where(self.same_ct >= self.nobs, self.prev, mean)
+
+
+class StreamingRollingFeatures:
+    def __init__(self, sensor_cols, window=10):
+        self.sensor_cols = list(sensor_cols)
+        self.window = window
+        self.roll_cols = [f'{c}_roll{window}' for c in self.sensor_cols]
+        self.engines = {}
+
+    def update(self, unit, values):
+        # values: the raw sensor readings of the engine's next cycle, in sensor_cols order
+        state = self.engines.get(unit)
+        if state is None:
+            state = self.engines[unit] = _EngineWindow(self.window, len(self.sensor_cols))
+        return state.push(np.asarray(values, dtype=np.float64))
+
+    def add_features(self, rec):
+        # rec: dict with 'unit' and the raw sensor columns; rolling means are added in place
+        means = self.update(rec['unit'], [rec[c] for c in self.sensor_cols])
+        rec.update(zip(self.roll_cols, means.tolist()))
+        return rec
+
+    def reset(self, unit):
+        self.engines.pop(unit, None)
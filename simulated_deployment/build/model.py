@@ -1,23 +1,160 @@
 # model.py
+import os
 import joblib
+import numpy as np
 from pathlib import Path
-from sklearn.svm import SVR
+from sklearn.svm import SVR, LinearSVR
+from sklearn.kernel_approximation import RBFSampler, Nystroem
+from sklearn.linear_model import SGDRegressor
+from sklearn.pipeline import Pipeline
 
-MODEL_FILE  = Path("../model/svr_model.joblib")
-SCALER_FILE = Path("../model/scaler.joblib")
+MODEL_FILE         = Path("../model/svr_model.joblib")
+COMPACT_MODEL_FILE = Path("../model/svr_compact.joblib")
+SCALER_FILE        = Path("../model/scaler.joblib")
+
+def _dump(obj, path):
+    # write next to the target and rename, so a running pipeline that watches ../model/
+    # never loads a half-written file
+    tmp = Path(path).with_name(Path(path).name + ".tmp")
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)
 
 def train_and_save(X_train, y_train):
-    svr = SVR(C=0.1, epsilon=0.05, kernel='rbf')
+    # gamma='scale' resolved here and stored on the model, so bundle.py/compress.py can
+    # read it back without the training data
+    svr = SVR(C=0.1, epsilon=0.05, kernel='rbf', gamma=rbf_gamma(X_train))
     svr.fit(X_train, y_train)
-    joblib.dump(svr, MODEL_FILE)
+    _dump(svr, MODEL_FILE)
     return svr
 
+# ---- Scalable approximation of the RBF SVR ----
+# An explicit feature map (random Fourier features or Nystroem) approximates the RBF
+# kernel, so a *linear* epsilon-insensitive regressor on the mapped features stands in
+# for the kernel SVR. Training cost becomes linear in the number of rows.
+
+def rbf_gamma(X):
+    # same value SVR uses for gamma='scale'
+    X = np.asarray(X)
+    return 1.0 / (X.shape[1] * X.var())
+
+def make_feature_map(X_sample, method='nystroem', n_components=500, gamma=None, random_state=42):
+    gamma = rbf_gamma(X_sample) if gamma is None else gamma
+    if method == 'rff':
+        fmap = RBFSampler(gamma=gamma, n_components=n_components, random_state=random_state)
+    elif method == 'nystroem':
+        fmap = Nystroem(kernel='rbf', gamma=gamma, n_components=min(n_components, len(X_sample)),
+                        random_state=random_state)
+    else:
+        raise ValueError(f"unknown kernel approximation '{method}'")
+    return fmap.fit(X_sample)
+
+def train_approx(X_train, y_train, method='nystroem', n_components=500, C=0.1, epsilon=0.05):
+    # in-memory: exact primal solve of the linear SVR on the mapped features
+    fmap = make_feature_map(X_train, method, n_components)
+    reg = LinearSVR(C=C, epsilon=epsilon, loss='epsilon_insensitive', dual=True,
+                    max_iter=20000, random_state=42)
+    reg.fit(fmap.transform(X_train), np.asarray(y_train))
+    return Pipeline([('map', fmap), ('reg', reg)])
+
+def train_approx_streaming(batches, X_sample, method='nystroem', n_components=500,
+                           epsilon=0.05, alpha=1e-4, epochs=5):
+    # out-of-core: the feature map is fitted on a sample, then an SGD regressor with the
+    # same epsilon-insensitive loss is updated with partial_fit one mini-batch at a time.
+    # `batches` is a callable returning a fresh iterator of (X, y) chunks for every epoch.
+    fmap = make_feature_map(X_sample, method, n_components)
+    reg = SGDRegressor(loss='epsilon_insensitive', epsilon=epsilon, alpha=alpha,
+                       learning_rate='adaptive', eta0=0.01, random_state=42)
+    for _ in range(epochs):
+        for X, y in batches():
+            reg.partial_fit(fmap.transform(X), np.asarray(y))
+    return Pipeline([('map', fmap), ('reg', reg)])
+
+def iter_minibatches(X, y, batch_size=2048, seed=42):
+    # shuffled in-memory chunks; swap for a reader over files to stream larger-than-RAM data
+    idx = np.random.default_rng(seed).permutation(len(X))
+    X, y = np.asarray(X), np.asarray(y)
+    for i in range(0, len(idx), batch_size):
+        j = idx[i:i + batch_size]
+        yield X[j], y[j]
+
+def train_approx_and_save(X_train, y_train, method='nystroem', n_components=500):
+    model = train_approx(X_train, y_train, method, n_components)
+    _dump(model, MODEL_FILE)
+    return model
+
+# ---- Compressed RBF model ----
+# SVR.predict costs O(#support vectors) per row. A reduced-set model keeps only a budget of
+# support vectors and refits their weights so its output tracks the full model:
+#   f(x) = sum_j coef_j * exp(-gamma * ||x - sv_j||^2) + intercept
+class CompactRBFModel:
+    def __init__(self, support_vectors, coef, intercept, gamma):
+        self.support_vectors_ = np.ascontiguousarray(support_vectors, dtype=np.float64)
+        self.coef_ = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept_ = float(intercept)
+        self.gamma = float(gamma)
+        self._sv_sq = (self.support_vectors_ ** 2).sum(axis=1)
+
+    @property
+    def n_support(self):
+        return len(self.support_vectors_)
+
+    def kernel(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        d = (X ** 2).sum(axis=1)[:, None] - 2.0 * X @ self.support_vectors_.T + self._sv_sq[None, :]
+        return np.exp(-self.gamma * np.maximum(d, 0.0))
+
+    def predict(self, X):
+        return self.kernel(X) @ self.coef_ + self.intercept_
+
+def is_rbf_svr(model):
+    return isinstance(model, SVR) and model.kernel == 'rbf'
+
+def svr_gamma(svr, X_train=None):
+    # numeric gamma the fitted SVR used; models saved with gamma='scale'/'auto' need the
+    # (scaled) training rows they were fitted on
+    if isinstance(svr.gamma, str) and X_train is None:
+        raise ValueError(f"SVR was saved with gamma={svr.gamma!r}; pass its training rows or retrain it")
+    if svr.gamma == 'scale':
+        return rbf_gamma(X_train)
+    if svr.gamma == 'auto':
+        return 1.0 / np.asarray(X_train).shape[1]
+    return svr.gamma
+
+def reduce_svr(svr, X_fit, gamma, budget, ridge=1e-6):
+    # keep the `budget` support vectors with the largest |dual coef|, then least-squares
+    # refit coef + intercept so the compact model reproduces svr.predict on X_fit
+    order = np.argsort(-np.abs(svr.dual_coef_[0]))[:budget]
+    model = CompactRBFModel(svr.support_vectors_[order], np.zeros(len(order)), 0.0, gamma)
+    K = np.hstack([model.kernel(X_fit), np.ones((len(X_fit), 1))])
+    target = svr.predict(X_fit)
+    A = K.T @ K
+    A[np.diag_indices_from(A)] += ridge * np.trace(A) / len(A)
+    sol = np.linalg.solve(A, K.T @ target)
+    model.coef_, model.intercept_ = sol[:-1], float(sol[-1])
+    return model
+
+def save_compact_model(model):
+    _dump(model, COMPACT_MODEL_FILE)
+
+def save_model(model):
+    _dump(model, MODEL_FILE)
+
 def save_scaler(scaler):
-    joblib.dump(scaler, SCALER_FILE)
+    _dump(scaler, SCALER_FILE)
+
+def load_scaler():
+    if not SCALER_FILE.exists():
+        raise FileNotFoundError("Run train.py first to produce model and scaler.")
+    return joblib.load(SCALER_FILE)
 
-def load_model_and_scaler():
-    if not MODEL_FILE.exists() or not SCALER_FILE.exists():
+def load_model_and_scaler(compact=False, mmap_mode=None):
+    # mmap_mode='r' maps the model's arrays (e.g. support vectors) from the page cache
+    # instead of copying them, so processes loading the same file share that memory
+    model_file = COMPACT_MODEL_FILE if compact else MODEL_FILE
+    if compact and not model_file.exists():
+        raise FileNotFoundError("Run compress.py first to produce the compact model.")
+    if not model_file.exists() or not SCALER_FILE.exists():
         raise FileNotFoundError("Run train.py first to produce model and scaler.")
-    svr    = joblib.load(MODEL_FILE)
+    svr    = joblib.load(model_file, mmap_mode=mmap_mode)
     scaler = joblib.load(SCALER_FILE)
     return svr, scaler
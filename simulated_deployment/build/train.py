@@ -1,28 +1,115 @@
 # train.py
-from data_loader import load_data, compute_rul
-from features import add_rolling_features, prepare_datasets, scale_data
-from model import train_and_save, save_scaler
+import argparse
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# import through the build package (like deploy/pipeline.py) so pickled objects
+# such as the scaler can be loaded back from either side
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from build.data_loader import (load_subset_arrays, load_subset_rul, load_subset_index, iter_engine_chunks,
+                               add_train_rul, COLUMN_NAMES, VALUE_COLS)
+from build.features import (add_rolling_features, prepare_matrix_datasets, scale_data, n_conditions_for,
+                            ConditionScaler, SETTING_COLS)
+from build.model import (train_and_save, train_approx_and_save, train_approx_streaming, iter_minibatches,
+                         save_model, save_scaler)
+
+SENSOR_COLS = [c for c in COLUMN_NAMES if 'sensor_measurement' in c]
+
+def prepare_features(subsets, val_all_rows=False):
+    # sensors + 20-cycle rolling means + settings, built from the cached arrays
+    # (see features.prepare_matrix_datasets)
+    train_ids, train_values = load_subset_arrays(subsets, 'train')
+    test_ids, test_values = load_subset_arrays(subsets, 'test')
+    train = (train_ids, train_values, load_subset_index(subsets, 'train'))
+    test = (test_ids, test_values, load_subset_index(subsets, 'test'))
+    return prepare_matrix_datasets(train, test, load_subset_rul(subsets), VALUE_COLS, SENSOR_COLS, window=20,
+                                   val_all_rows=val_all_rows)
+
+# ---- Out-of-core training ----
+# The training files are streamed a group of engines at a time; each group gets its RUL
+# and rolling features on its own, which is exact because no engine spans two groups.
+
+def iter_training_chunks(subsets, engines_per_chunk=50, window=20, seed=None):
+    roll_cols = [f"{c}_roll{window}" for c in SENSOR_COLS]
+    feature_cols = SENSOR_COLS + roll_cols + SETTING_COLS
+    for df in iter_engine_chunks(subsets, engines_per_chunk, seed=seed):
+        df = add_train_rul(df)
+        df = add_rolling_features(df, SENSOR_COLS, window)
+        yield df[feature_cols], df['RUL'].to_numpy()
+
+def train_out_of_core(subsets, method='nystroem', n_components=500, engines_per_chunk=50,
+                      epochs=5, sample_size=5000):
+    # pass 1: keep a uniform sample of rows (smallest random keys) and the settings' extremes.
+    # The sample spans every subset, so the condition centroids are fit on it; it is also
+    # what the kernel feature map is fit on.
+    scaler = ConditionScaler(n_conditions_for(subsets))
+    rng = np.random.default_rng(42)
+    sample, keys = None, np.empty(0)
+    smin, smax = np.inf, -np.inf
+    for X, _ in iter_training_chunks(subsets, engines_per_chunk):
+        settings = X[SETTING_COLS].to_numpy(np.float64)
+        smin, smax = np.minimum(smin, settings.min(axis=0)), np.maximum(smax, settings.max(axis=0))
+        if scaler.n_conditions == 1:
+            scaler.partial_fit(X)
+        sample = X if sample is None else pd.concat([sample, X])
+        keys = np.r_[keys, rng.random(len(X))]
+        if len(keys) > sample_size:
+            keep = np.argpartition(keys, sample_size)[:sample_size]
+            sample, keys = sample.iloc[keep], keys[keep]
+
+    # pass 2 (several conditions only): per-condition min/max against the fitted centroids
+    if scaler.n_conditions > 1:
+        scaler.fit_conditions(sample, smin, smax)
+        for X, _ in iter_training_chunks(subsets, engines_per_chunk):
+            scaler.partial_fit(X)
+
+    # later passes: scaled mini-batches for the incremental SGD regressor, one epoch each,
+    # with the engine groups in a new order every epoch
+    epoch_seeds = iter(rng.integers(1 << 31, size=epochs))
+
+    def batches():
+        for X, y in iter_training_chunks(subsets, engines_per_chunk, seed=next(epoch_seeds)):
+            yield from iter_minibatches(scaler.transform(X), y)
+
+    model = train_approx_streaming(batches, scaler.transform(sample), method, n_components, epochs=epochs)
+    return model, scaler
 
 if __name__=="__main__":
-    # load & preprocess
-    train_df, test_df, rul_df = load_data(
-        "../../dataset/CMAPSSData/train_FD001.txt",
-        "../../dataset/CMAPSSData/test_FD001.txt",
-        "../../dataset/CMAPSSData/RUL_FD001.txt"
-    )
-    train_df, test_df = compute_rul(train_df, test_df, rul_df)
-
-    # optional rolling features
-    sensor_cols = [c for c in train_df.columns if 'sensor_measurement' in c]
-    train_df = add_rolling_features(train_df, sensor_cols, window=20)
-    test_df  = add_rolling_features(test_df,  sensor_cols, window=20)
-    sensor_cols += [f"{c}_roll20" for c in sensor_cols]
-
-    # prepare & scale
-    X_tr, y_tr, X_va, y_va, X_te, y_te, _ = prepare_datasets(train_df, test_df, sensor_cols)
-    X_tr_s, X_va_s, X_te_s, scaler = scale_data(X_tr, X_va, X_te)
-
-    # train & save
-    train_and_save(X_tr_s, y_tr)
+    parser = argparse.ArgumentParser(description="Train and save the SVR RUL model")
+    parser.add_argument("--subsets", nargs="+", default=["FD001"],
+                        choices=["FD001", "FD002", "FD003", "FD004"],
+                        help="CMAPSS subsets to train on (sensors are scaled per operating condition)")
+    parser.add_argument("--model", choices=["svr", "nystroem", "rff"], default="svr",
+                        help="svr: exact RBF SVR; nystroem/rff: kernel approximation + linear SVR")
+    parser.add_argument("--n-components", type=int, default=500,
+                        help="size of the approximate feature map (nystroem/rff only)")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="stream the training data in groups of engines (nystroem/rff only)")
+    parser.add_argument("--chunk-engines", type=int, default=50,
+                        help="engines per chunk with --out-of-core")
+    parser.add_argument("--epochs", type=int, default=5, help="SGD passes over the data with --out-of-core")
+    args = parser.parse_args()
+
+    if args.out_of_core:
+        if args.model == "svr":
+            parser.error("--out-of-core needs --model nystroem or rff (the exact SVR can't train incrementally)")
+        model, scaler = train_out_of_core(args.subsets, args.model, args.n_components,
+                                          args.chunk_engines, args.epochs)
+        save_model(model)
+    else:
+        # load, add features & split
+        X_tr, y_tr, X_va, y_va, X_te, y_te, _ = prepare_features(args.subsets)
+
+        # scale
+        X_tr_s, X_va_s, X_te_s, scaler = scale_data(X_tr, X_va, X_te, n_conditions_for(args.subsets))
+
+        # train & save
+        if args.model == "svr":
+            train_and_save(X_tr_s, y_tr)
+        else:
+            train_approx_and_save(X_tr_s, y_tr, args.model, args.n_components)
     save_scaler(scaler)
     print("Training complete – model and scaler saved.")
@@ -0,0 +1,122 @@
+# boundedqueue.py
+# Bounded drop-in for queue.Queue between the producer/ingest side and the consumers.
+# What happens when it's full depends on the overload policy:
+#   block        put() waits for room (backpressure on the producer)
+#   drop-oldest  the oldest queued record is discarded to make room (load shedding)
+#   coalesce     at most one queued record per engine: a newer cycle replaces the queued
+#                one in place (the monitor only shows the latest RUL); put() blocks only
+#                when `maxsize` different engines are already waiting
+# Records carry their own rolling features, so skipping cycles doesn't disturb the
+# per-engine state. Stop sentinels (None) are never dropped or coalesced and never wait
+# for room. Dropped and replaced records count as done for join(). `on_get`, if set, is
+# called (with the mutex held, so it must not touch the queue) every time a consumer takes
+# an entry, e.g. to wake producers that can't block on not_full.
+import queue
+import time
+from collections import deque
+
+POLICIES = ("block", "drop-oldest", "coalesce")
+
+
+class BoundedQueue(queue.Queue):
+    def __init__(self, maxsize=0, policy="block"):
+        super().__init__(maxsize)
+        self.on_get = None
+        self.configure(maxsize, policy)
+
+    def configure(self, maxsize=0, policy="block"):
+        # only while empty: modules hold references to the queue, so it's set up in place
+        if policy not in POLICIES:
+            raise ValueError(f"unknown queue policy {policy!r}; choose from {POLICIES}")
+        with self.mutex:
+            if self.queue:
+                raise RuntimeError("can't reconfigure a non-empty queue")
+            self.maxsize = maxsize
+            self.policy = policy
+            self.dropped = 0
+            self.coalesced = 0
+            self.max_depth = 0
+
+    # -- storage: a deque of records, or for coalesce a deque of keys + newest record per key
+
+    def _init(self, maxsize):
+        self.queue = deque()
+        self.pending = {}
+
+    def _qsize(self):
+        return len(self.queue)
+
+    def _put(self, item):
+        if self.policy == "coalesce":
+            key = object() if item is None else item.unit
+            self.pending[key] = item
+            item = key
+        self.queue.append(item)
+        if len(self.queue) > self.max_depth:
+            self.max_depth = len(self.queue)
+
+    def _get(self):
+        item = self.queue.popleft()
+        if self.on_get is not None:
+            self.on_get()
+        if self.policy == "coalesce":
+            return self.pending.pop(item)
+        return item
+
+    def put(self, item, block=True, timeout=None):
+        with self.not_full:
+            if item is not None:
+                # a queued record of the same engine is replaced, whatever the bound
+                if self._coalesce(item):
+                    return
+                if self.maxsize > 0:
+                    if self.policy == "drop-oldest":
+                        self._drop_oldest(block, timeout)
+                    else:
+                        self._wait_for_room(block, timeout)
+                        # the engine may have been queued while we waited
+                        if self._coalesce(item):
+                            return
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def _coalesce(self, item):
+        if self.policy != "coalesce" or item.unit not in self.pending:
+            return False
+        self.pending[item.unit] = item
+        self.coalesced += 1
+        return True
+
+    def _drop_oldest(self, block, timeout):
+        # discard the oldest records (skipping stop sentinels) until there's room; if only
+        # sentinels are queued there's nothing to drop, so wait like block does
+        while self._qsize() >= self.maxsize:
+            i = next((i for i, q in enumerate(self.queue) if q is not None), None)
+            if i is None:
+                self._wait_for_room(block, timeout)
+                return
+            del self.queue[i]
+            self.dropped += 1
+            self.unfinished_tasks -= 1
+
+    def _wait_for_room(self, block, timeout):
+        # same semantics as queue.Queue.put; called with the mutex held
+        if not block:
+            if self._qsize() >= self.maxsize:
+                raise queue.Full
+        elif timeout is None:
+            while self._qsize() >= self.maxsize:
+                self.not_full.wait()
+        else:
+            endtime = time.monotonic() + timeout
+            while self._qsize() >= self.maxsize:
+                remaining = endtime - time.monotonic()
+                if remaining <= 0.0:
+                    raise queue.Full
+                self.not_full.wait(remaining)
+
+    def stats(self):
+        with self.mutex:
+            return {"policy": self.policy, "capacity": self.maxsize, "depth": self._qsize(),
+                    "max_depth": self.max_depth, "dropped": self.dropped, "coalesced": self.coalesced}
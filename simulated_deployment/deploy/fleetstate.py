@@ -0,0 +1,133 @@
+# fleetstate.py
+# Latest state per engine in a shared-memory table: the pipeline (writer) updates an
+# engine's slot after every prediction and monitor.py (reader) attaches to the same
+# segment and copies the whole table, so a refresh costs the same however many
+# predictions have been made.
+#
+# Layout: a 64-byte header followed by fixed-width 48-byte slots, one per engine in order
+# of first appearance
+#   header  magic 8s | capacity u32 | used u32 | run token u64 | closed u8
+#   slot    seq u64 | unit i32 | cycle i32 | rul f64 | prev_rul f64 | ts f64 | model u32 | status u8
+# Slots are guarded by a seqlock: the writer makes seq odd, writes the fields, then makes
+# it even again; a reader that saw an odd seq, or a different seq after copying, retries.
+# There is one writer per table (consumer threads share it under a lock).
+import os
+import time
+import struct
+import threading
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+DEFAULT_NAME = "rul_fleet"
+DEFAULT_CAPACITY = 65536
+
+MAGIC = b'RULFLT01'
+HEADER_SIZE = 64
+_HEADER = struct.Struct('<8sIIQB')
+_USED_OFFSET = 12
+_CLOSED_OFFSET = 24
+_SEQ = struct.Struct('<Q')
+_FIELDS = struct.Struct('<iidddIB3x')
+SLOT_DTYPE = np.dtype({'names': ['seq', 'unit', 'cycle', 'rul', 'prev_rul', 'ts', 'model', 'status'],
+                       'formats': ['<u8', '<i4', '<i4', '<f8', '<f8', '<f8', '<u4', 'u1'],
+                       'offsets': [0, 8, 12, 16, 24, 32, 40, 44], 'itemsize': 48})
+
+STATUSES = ("Healthy", "Minor", "Major", "Broken")
+
+
+def classify(rul):
+    if rul > 100: return "Healthy"
+    if rul > 50:  return "Minor"
+    if rul > 20:  return "Major"
+    return "Broken"
+
+
+_STATUS_CODE = {s: i for i, s in enumerate(STATUSES)}
+
+
+class FleetStateWriter:
+    def __init__(self, name=DEFAULT_NAME, capacity=DEFAULT_CAPACITY):
+        # a segment left behind by a crashed run is replaced
+        try:
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = shared_memory.SharedMemory(name, create=True, size=HEADER_SIZE + capacity * SLOT_DTYPE.itemsize)
+        self.name = name
+        self.capacity = capacity
+        self.buf = self.shm.buf
+        _HEADER.pack_into(self.buf, 0, MAGIC, capacity, 0, int.from_bytes(os.urandom(8), 'little'), 0)
+        self.slots = {}
+        self.overflow = 0
+        self.lock = threading.Lock()
+
+    def update(self, unit, cycle, rul, model=0):
+        self.update_batch([unit], [cycle], [rul], model)
+
+    def update_batch(self, units, cycles, ruls, model=0):
+        ts = time.time()
+        buf = self.buf
+        with self.lock:
+            for unit, cycle, rul in zip(units, cycles, ruls):
+                unit = int(unit)
+                slot = self.slots.get(unit)
+                new = slot is None
+                if new:
+                    if len(self.slots) == self.capacity:
+                        self.overflow += 1
+                        continue
+                    slot = self.slots[unit] = len(self.slots)
+                off = HEADER_SIZE + slot * SLOT_DTYPE.itemsize
+                seq = _SEQ.unpack_from(buf, off)[0]
+                prev = np.nan if new else _FIELDS.unpack_from(buf, off + 8)[2]
+                _SEQ.pack_into(buf, off, seq + 1)
+                _FIELDS.pack_into(buf, off + 8, unit, int(cycle), rul, prev, ts, model,
+                                  _STATUS_CODE[classify(rul)])
+                _SEQ.pack_into(buf, off, seq + 2)
+                if new:
+                    # publish the slot only once it holds a complete record
+                    struct.pack_into('<I', buf, _USED_OFFSET, len(self.slots))
+
+    def close(self):
+        # readers still attached keep the final table and see it marked closed
+        self.buf[_CLOSED_OFFSET] = 1
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FleetStateReader:
+    def __init__(self, name=DEFAULT_NAME):
+        # raises FileNotFoundError if no pipeline has created the table yet
+        self.shm = shared_memory.SharedMemory(name)
+        # attaching registers the segment with this process' resource tracker, which would
+        # unlink it when the monitor exits; the pipeline owns it
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        magic, self.capacity, _, self.token, _ = _HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC:
+            self.shm.close()
+            raise ValueError(f"shared memory '{name}' is not a fleet state table")
+
+    @property
+    def closed(self):
+        return bool(self.shm.buf[_CLOSED_OFFSET])
+
+    def snapshot(self):
+        # consistent copy of every used slot (SLOT_DTYPE records)
+        n = struct.unpack_from('<I', self.shm.buf, _USED_OFFSET)[0]
+        table = np.ndarray((n,), dtype=SLOT_DTYPE, buffer=self.shm.buf, offset=HEADER_SIZE)
+        out = table.copy()
+        retry = np.arange(n)
+        while True:
+            seq = table['seq'][retry]
+            torn = (out['seq'][retry] & 1).astype(bool) | (out['seq'][retry] != seq)
+            retry = retry[torn]
+            if not len(retry):
+                return out
+            time.sleep(0)
+            out[retry] = table[retry]
+
+    def close(self):
+        self.shm.close()
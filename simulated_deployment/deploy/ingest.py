@@ -0,0 +1,216 @@
+# ingest.py
+# asyncio ingestion front end: engines (or gateways) stream line-delimited sensor records
+# over local TCP and/or Unix sockets; records are featurized and handed to the same
+# consumer pool pipeline.py uses. While the bounded inference queue is full the server
+# stops reading from its sockets, so TCP flow control pushes back on the senders (with
+# --queue-policy drop-oldest it keeps reading and the queue sheds the oldest records).
+#
+# A line is either a raw CMAPSS row (26 whitespace-separated values, as in test_FD00x.txt)
+# or a JSON object with "unit", "cycle" and the sensor/setting columns. Cycles of one
+# engine must arrive in order (one engine per connection keeps that trivially true).
+#
+#   python ingest.py --tcp 127.0.0.1:9009 --unix /tmp/rul.sock --mode batch
+#   python loadgen.py --tcp 127.0.0.1:9009 --replicate 10
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+import numpy as np
+
+import pipeline
+import instrument
+from pipeline import Q
+from build.data_loader import COLUMN_NAMES
+from build.features import StreamingRollingFeatures
+from record import make_record, RAW_COLS, SENSOR_COLS, ROLL_WINDOW
+from predlog import open_log
+from fleetstate import FleetStateWriter, DEFAULT_NAME as FLEET_NAME, DEFAULT_CAPACITY as FLEET_CAPACITY
+from boundedqueue import POLICIES as QUEUE_POLICIES
+
+STATS = {"connections": 0, "open": 0, "records": 0, "bad_lines": 0, "paused": 0}
+
+
+# Returns (unit, cycle, raw values in RAW_COLS order), or None for blank lines;
+# raises ValueError/KeyError/TypeError on malformed input
+def parse_line(line):
+    line = line.strip()
+    if not line:
+        return None
+    if line[:1] == b'{':
+        obj = json.loads(line)
+        return int(obj["unit"]), int(obj["cycle"]), np.array([float(obj[c]) for c in RAW_COLS])
+    vals = line.split()
+    if len(vals) < len(COLUMN_NAMES):
+        raise ValueError(f"expected {len(COLUMN_NAMES)} values, got {len(vals)}")
+    return int(float(vals[0])), int(float(vals[1])), np.array(vals[2:len(COLUMN_NAMES)], dtype=np.float64)
+
+
+class IngestServer:
+    def __init__(self, rolling=True):
+        self.rolling = StreamingRollingFeatures(SENSOR_COLS, window=ROLL_WINDOW) if rolling else None
+        self.last_activity = time.monotonic()
+        self.loop = None
+        self.waiters = deque()  # futures of paused connections, oldest first
+
+    def attach(self, loop):
+        # consumers take records on their own threads; each take wakes one paused
+        # connection on the loop (nothing is scheduled while none is paused)
+        self.loop = loop
+        Q.on_get = lambda: self.waiters and loop.call_soon_threadsafe(self._wake_one)
+
+    def _wake_one(self):
+        while self.waiters:
+            fut = self.waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+
+    async def wait_for_room(self):
+        # backpressure: hold this connection's reader while the consumers catch up, so
+        # Q.put never blocks the event loop (this loop is the queue's only writer)
+        if Q.policy == "drop-oldest" or not Q.full():
+            return
+        STATS["paused"] += 1
+        while Q.full():
+            fut = self.loop.create_future()
+            self.waiters.append(fut)
+            # re-checked after registering, so a take in between isn't missed
+            if not Q.full():
+                fut.cancel()
+                return
+            await fut
+
+    async def handle(self, reader, writer):
+        STATS["connections"] += 1
+        STATS["open"] += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                t = instrument.clock()
+                try:
+                    parsed = parse_line(line)
+                except (ValueError, KeyError, TypeError) as e:
+                    STATS["bad_lines"] += 1
+                    writer.write(f"ERR {e!r}\n".encode())
+                    continue
+                if parsed is None:
+                    continue
+                rec = make_record(*parsed, self.rolling)
+                instrument.lap("ingest", "featurize", t)
+                await self.wait_for_room()
+                t = instrument.clock()
+                rec.t_enq = time.perf_counter()
+                Q.put(rec)
+                instrument.lap("ingest", "enqueue", t)
+                STATS["records"] += 1
+                self.last_activity = time.monotonic()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            STATS["open"] -= 1
+            self.last_activity = time.monotonic()
+            writer.close()
+
+
+async def report(interval):
+    last, t_last = 0, time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        n = STATS["records"]
+        print(f"[Ingest] {STATS['open']} open / {STATS['connections']} total connections, "
+              f"{n} records ({(n - last) / (now - t_last):.0f} rec/s), queue {Q.qsize()}, "
+              f"paused {STATS['paused']}x, dropped {Q.dropped}, coalesced {Q.coalesced}, "
+              f"bad lines {STATS['bad_lines']}")
+        last, t_last = n, now
+
+
+async def serve(server, tcp=None, unix=None, report_interval=5.0, idle_exit=None):
+    server.attach(asyncio.get_running_loop())
+    servers = []
+    if tcp:
+        host, port = tcp.rsplit(":", 1)
+        servers.append(await asyncio.start_server(server.handle, host, int(port), backlog=4096))
+        print(f"[Ingest] listening on tcp://{tcp}")
+    if unix:
+        if os.path.exists(unix):
+            os.unlink(unix)
+        servers.append(await asyncio.start_unix_server(server.handle, unix, backlog=4096))
+        print(f"[Ingest] listening on unix://{unix}")
+    reporter = asyncio.create_task(report(report_interval))
+    try:
+        while True:
+            await asyncio.sleep(0.5)
+            # --idle-exit: stop once every sender has hung up and nothing arrived for a while
+            if (idle_exit is not None and STATS["records"] and not STATS["open"]
+                    and time.monotonic() - server.last_activity > idle_exit):
+                break
+    finally:
+        Q.on_get = None
+        reporter.cancel()
+        for s in servers:
+            s.close()
+            await s.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asyncio socket ingestion for the RUL pipeline")
+    parser.add_argument("--tcp", default="127.0.0.1:9009", help="host:port to listen on ('' to disable)")
+    parser.add_argument("--unix", default=None, help="Unix socket path to listen on")
+    parser.add_argument("--queue-size", type=int, default=pipeline.QUEUE_SIZE,
+                        help="max records waiting for inference; sockets pause while it's full")
+    parser.add_argument("--queue-policy", choices=QUEUE_POLICIES, default="block")
+    parser.add_argument("--no-rolling", action="store_true", help="don't add _roll20 features")
+    parser.add_argument("--mode", choices=["single", "batch"], default="batch")
+    parser.add_argument("--backend", choices=["thread", "process"], default="thread")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=pipeline.BATCH_SIZE)
+    parser.add_argument("--batch-timeout-ms", type=float, default=pipeline.BATCH_TIMEOUT_MS)
+    parser.add_argument("--model", choices=["svr", "compact"], default="svr")
+    parser.add_argument("--engine", choices=["sklearn", "numpy"], default="sklearn")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the model arrays")
+    parser.add_argument("--reload-interval", type=float, default=2.0,
+                        help="seconds between checks of ../model/ for a retrained model to hot-swap (0: off)")
+    parser.add_argument("--log-format", choices=["binary", "jsonl"], default="binary")
+    parser.add_argument("--fleet-state", default=FLEET_NAME,
+                        help="shared-memory name of the per-engine state table monitor.py reads ('' to disable)")
+    parser.add_argument("--fleet-capacity", type=int, default=FLEET_CAPACITY, help="max engines in the state table")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--idle-exit", type=float, default=None,
+                        help="exit after all connections close and no data arrived for N seconds")
+    args = parser.parse_args()
+
+    pipeline.ENGINE = args.engine
+    pipeline.COMPACT_MODEL = args.model == "compact"
+    pipeline.MMAP_MODEL = args.mmap
+    pipeline.CONSUMER_DELAY = 0.0
+    pipeline.VERBOSE = False
+    Q.configure(args.queue_size, args.queue_policy)
+    pipeline.LOG = open_log(args.log_format, truncate=True)
+    if args.fleet_state:
+        pipeline.FLEET = FleetStateWriter(args.fleet_state, args.fleet_capacity)
+    n_readers, readers = pipeline.start_consumers(args.backend, args.mode, args.workers,
+                                         args.batch_size, args.batch_timeout_ms,
+                                         reload_interval=args.reload_interval)
+
+    start = time.perf_counter()
+    try:
+        asyncio.run(serve(IngestServer(not args.no_rolling),
+                          args.tcp or None, args.unix, args.report_interval, args.idle_exit))
+    except KeyboardInterrupt:
+        pass
+
+    print("[Ingest] stopped accepting; draining queue…")
+    for _ in range(n_readers):
+        Q.put(None)
+    Q.join()
+    for t in readers:
+        t.join()
+    pipeline.LOG.close()
+    if pipeline.FLEET is not None:
+        pipeline.FLEET.close()
+    pipeline.report_stats(time.perf_counter() - start)
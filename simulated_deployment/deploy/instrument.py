@@ -0,0 +1,162 @@
+# instrument.py
+# Low-overhead stage timers and counters for the pipeline hot path.
+#
+#   t = instrument.clock()                       # 0 when disabled
+#   ...work...
+#   t = instrument.lap("consumer-1", "scale", t) # records the stage, returns a fresh clock
+#
+# Durations go into per-(worker, stage) histograms with power-of-two nanosecond buckets,
+# so recording is an integer bit_length and a list increment. Every hook returns right
+# away while ENABLED is False. Each worker only writes its own histograms, so updates need
+# no lock; readers take an approximate snapshot.
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = False
+
+# bucket i holds durations < 2**(i + 10) ns: 1 µs, 2 µs, … up to ~69 s in the last one
+N_BUCKETS = 27
+STAGES = ("enqueue", "dequeue_wait", "featurize", "scale", "predict", "persist")
+
+_hists = {}
+_counters = {}
+_started = time.time()
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.buckets = [0] * N_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        i = ns.bit_length() - 10
+        self.buckets[0 if i < 0 else (i if i < N_BUCKETS else N_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q):
+        # upper edge of the bucket holding the q-th percentile, in µs
+        if not self.count:
+            return 0.0
+        rank, seen = q / 100.0 * self.count, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(2 ** (i + 10), self.max_ns) / 1000.0
+        return self.max_ns / 1000.0
+
+    def summary(self):
+        return {"count": self.count,
+                "mean_us": self.total_ns / self.count / 1000.0 if self.count else 0.0,
+                "p50_us": self.percentile(50), "p95_us": self.percentile(95),
+                "p99_us": self.percentile(99), "max_us": self.max_ns / 1000.0,
+                "total_s": self.total_ns / 1e9}
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+
+def reset():
+    global _started
+    _hists.clear()
+    _counters.clear()
+    _started = time.time()
+
+
+def clock():
+    return time.perf_counter_ns() if ENABLED else 0
+
+
+def observe(worker, stage, ns):
+    if not ENABLED:
+        return
+    h = _hists.get((worker, stage))
+    if h is None:
+        h = _hists.setdefault((worker, stage), Histogram())
+    h.add(ns)
+
+
+def lap(worker, stage, t0):
+    if not ENABLED:
+        return 0
+    now = time.perf_counter_ns()
+    observe(worker, stage, now - t0)
+    return now
+
+
+def count(worker, name, n=1):
+    if not ENABLED:
+        return
+    key = (worker, name)
+    _counters[key] = _counters.get(key, 0) + n
+
+
+def snapshot():
+    workers = {}
+    for (w, stage), h in list(_hists.items()):
+        workers.setdefault(w, {"stages": {}, "counters": {}})["stages"][stage] = h.summary()
+    for (w, name), n in list(_counters.items()):
+        workers.setdefault(w, {"stages": {}, "counters": {}})["counters"][name] = n
+    return {"enabled": ENABLED, "uptime_s": time.time() - _started, "workers": workers}
+
+
+def format_table(snap=None):
+    snap = snap or snapshot()
+    lines = [f"{'worker':<12} │ {'stage':<12} │ {'count':>8} │ {'mean µs':>9} │ {'p50 µs':>8} │ "
+             f"{'p99 µs':>8} │ {'total s':>8}"]
+    for w in sorted(snap["workers"]):
+        stages = snap["workers"][w]["stages"]
+        for stage in sorted(stages, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            h = stages[stage]
+            lines.append(f"{w:<12} │ {stage:<12} │ {h['count']:>8} │ {h['mean_us']:>9.1f} │ "
+                         f"{h['p50_us']:>8.1f} │ {h['p99_us']:>8.1f} │ {h['total_s']:>8.3f}")
+    return "\n".join(lines)
+
+
+# ---- Periodic dump and pull endpoint ----
+
+def start_dumper(interval, out=print):
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            out("[Stats]\n" + format_table())
+
+    threading.Thread(target=loop, daemon=True).start()
+    return stop
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") in ("", "/stats"):
+            body, ctype = json.dumps(snapshot()).encode(), "application/json"
+        elif self.path == "/stats.txt":
+            body, ctype = format_table().encode(), "text/plain; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port=8765, host="127.0.0.1"):
+    # GET /stats (JSON) or /stats.txt (table) from a local background HTTP server
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,86 @@
+# loadgen.py
+# Load generator for ingest.py: replays the CMAPSS test files as raw text lines over many
+# concurrent connections. Engines are spread over --connections sockets (default: one per
+# engine); each connection walks its engines' cycles in order, optionally paced at
+# --cycle-interval seconds per cycle, and honours the server's backpressure via drain().
+#   python loadgen.py --tcp 127.0.0.1:9009 --subsets FD001 FD003 --replicate 10
+import argparse
+import asyncio
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from build.data_loader import subset_paths, UNIT_OFFSET
+from pipeline import REPLICA_OFFSET
+
+
+def load_engines(subsets, replicate=1):
+    # {unit id: [line bytes, ...]} with ids offset per subset and replica like the pipeline
+    engines = {}
+    for subset in subsets:
+        offset = (int(subset[-3:]) - 1) * UNIT_OFFSET
+        with open(subset_paths(subset)[1], 'rb') as f:
+            rows = [line.split() for line in f if line.strip()]
+        for k in range(replicate):
+            for vals in rows:
+                uid = int(vals[0]) + offset + k * REPLICA_OFFSET
+                engines.setdefault(uid, []).append(b' '.join([str(uid).encode()] + vals[1:]) + b'\n')
+    return engines
+
+
+async def open_connection(tcp=None, unix=None):
+    if unix:
+        return await asyncio.open_unix_connection(unix)
+    host, port = tcp.rsplit(":", 1)
+    return await asyncio.open_connection(host, int(port))
+
+
+async def feed(engine_lines, tcp, unix, cycle_interval, sent):
+    # one connection: interleave its engines cycle by cycle
+    reader, writer = await open_connection(tcp, unix)
+    start = time.perf_counter()
+    longest = max(len(lines) for lines in engine_lines)
+    for i in range(longest):
+        if cycle_interval:
+            delay = start + i * cycle_interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        for lines in engine_lines:
+            if i < len(lines):
+                writer.write(lines[i])
+                sent[0] += 1
+        await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def main(args):
+    engines = load_engines(args.subsets, args.replicate)
+    n_conn = min(args.connections or len(engines), len(engines))
+    slots = [[] for _ in range(n_conn)]
+    for i, lines in enumerate(engines.values()):
+        slots[i % n_conn].append(lines)
+    total = sum(len(lines) for lines in engines.values())
+    print(f"[Loadgen] {len(engines)} engines, {total} records over {n_conn} connections")
+
+    sent = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(feed(s, args.tcp, args.unix, args.cycle_interval, sent) for s in slots))
+    wall = time.perf_counter() - start
+    print(f"[Loadgen] sent {sent[0]} records in {wall:.2f}s ({sent[0] / wall:.0f} rec/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay CMAPSS test engines against ingest.py")
+    parser.add_argument("--tcp", default="127.0.0.1:9009", help="server host:port")
+    parser.add_argument("--unix", default=None, help="connect to this Unix socket instead of TCP")
+    parser.add_argument("--subsets", nargs="+", default=["FD001"],
+                        choices=["FD001", "FD002", "FD003", "FD004"])
+    parser.add_argument("--replicate", type=int, default=1, help="copies of the fleet (synthetic engines)")
+    parser.add_argument("--connections", type=int, default=None, help="sockets to open (default: one per engine)")
+    parser.add_argument("--cycle-interval", type=float, default=0.0,
+                        help="seconds between an engine's cycles (0 = as fast as the server accepts)")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -1,47 +1,108 @@
 import time
 import os
-import json
+import argparse
+import numpy as np
 
-LOG_FILE = "../model/predictions.log"
+from predlog import BIN_LOG_FILE, JSON_LOG_FILE, LogTailer, BinaryLogTailer
+from fleetstate import FleetStateReader, DEFAULT_NAME as FLEET_NAME, STATUSES, classify
 
-# track latest per engine
+# track latest per engine (log source)
 latest = {}
 
-# classification
-def classify(rul):
-    if rul > 100: return "Healthy"
-    if rul > 50:  return "Minor"
-    if rul > 20:  return "Major"
-    return "Broken"
-
 # clear console
 def clear():
     os.system('cls' if os.name == 'nt' else 'clear')
 
-if __name__ == "__main__":
-    print("Starting file-based monitor… (Ctrl-C to exit)")
-    try:
-        while True:
-            time.sleep(2)
-            # reload log
-            if not os.path.exists(LOG_FILE):
-                print("[Monitor] No log file yet…")
+def print_header():
+    print(f"{'Engine':>6} │ {'Cycle':>5} │ {'RUL':>7} │ {'ΔRUL':>6} │ Status")
+    print("──────┼───────┼─────────┼────────┼────────")
+
+# Reads the pipeline's shared-memory table (fleetstate.py): each refresh copies the latest
+# state of every engine, independent of how many predictions were made
+def monitor_state(name, interval):
+    print("Starting shared-memory monitor… (Ctrl-C to exit)")
+    reader = None
+    while True:
+        time.sleep(interval)
+        if reader is None or reader.closed:
+            # (re)attach: the pipeline hasn't started yet, or a run ended and maybe a new one began
+            try:
+                new = FleetStateReader(name)
+            except FileNotFoundError:
+                new = None
+            if new is not None and (reader is None or new.token != reader.token):
+                if reader is not None:
+                    reader.close()
+                reader = new
+            elif new is not None:
+                new.close()
+            if reader is None:
+                print("[Monitor] No pipeline running yet…")
                 continue
 
-            with open(LOG_FILE) as f:
-                for line in f:
-                    rec = json.loads(line)
-                    u = rec['unit']; c = rec['cycle']; r = rec['rul']
-                    prev = latest.get(u, {})
-                    latest[u] = {'cycle': c, 'rul': r, 'prev': prev.get('rul')}
-
-            clear()
-            print(f"{'Engine':>6} │ {'Cycle':>5} │ {'RUL':>7} │ {'ΔRUL':>6} │ Status")
-            print("──────┼───────┼─────────┼────────┼────────")
-            for u in sorted(latest):
-                info = latest[u]
-                delta = info['rul'] - info['prev'] if info['prev'] is not None else 0.0
-                status = classify(info['rul'])
-                print(f"{u:>6} │ {info['cycle']:>5} │ {info['rul']:7.2f} │ {delta:6.2f} │ {status}")
+        t = time.perf_counter()
+        snap = reader.snapshot()
+        took_us = (time.perf_counter() - t) * 1e6
+
+        clear()
+        note = ", pipeline stopped" if reader.closed else ""
+        print(f"[Monitor] {len(snap)} engines, snapshot in {took_us:.0f} µs{note}")
+        print_header()
+        for rec in snap[np.argsort(snap['unit'], kind='stable')]:
+            delta = rec['rul'] - rec['prev_rul'] if not np.isnan(rec['prev_rul']) else 0.0
+            print(f"{rec['unit']:>6} │ {rec['cycle']:>5} │ {rec['rul']:7.2f} │ {delta:6.2f} │ "
+                  f"{STATUSES[rec['status']]}")
+
+# Tails the prediction log and replays it into `latest`
+def monitor_log(log_format, interval):
+    if log_format == "binary":
+        LOG_FILE, tailer = BIN_LOG_FILE, BinaryLogTailer(BIN_LOG_FILE)
+    else:
+        LOG_FILE, tailer = JSON_LOG_FILE, LogTailer(JSON_LOG_FILE)
+
+    print("Starting file-based monitor… (Ctrl-C to exit)")
+    total = 0
+    while True:
+        time.sleep(interval)
+        if not os.path.exists(LOG_FILE):
+            print("[Monitor] No log file yet…")
+            continue
+
+        # read only what was appended since the last refresh
+        records, event = tailer.poll()
+        if event == 'truncated':
+            # producer cleared the log: a new run started
+            latest.clear()
+            total = 0
+
+        for u, c, r in records:
+            prev = latest.get(u, {})
+            latest[u] = {'cycle': c, 'rul': r, 'prev': prev.get('rul')}
+        total += len(records)
+
+        clear()
+        note = f", log {event}" if event else ""
+        print(f"[Monitor] +{len(records)} records this refresh ({total} total{note})")
+        print_header()
+        for u in sorted(latest):
+            info = latest[u]
+            delta = info['rul'] - info['prev'] if info['prev'] is not None else 0.0
+            status = classify(info['rul'])
+            print(f"{u:>6} │ {info['cycle']:>5} │ {info['rul']:7.2f} │ {delta:6.2f} │ {status}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Engine health monitor")
+    parser.add_argument("--source", choices=["state", "log"], default="state",
+                        help="state: the pipeline's shared-memory table; log: tail the prediction log")
+    parser.add_argument("--fleet-state", default=FLEET_NAME, help="shared-memory name of the state table")
+    parser.add_argument("--log-format", choices=["binary", "jsonl"], default="binary")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between refreshes")
+    args = parser.parse_args()
+
+    try:
+        if args.source == "state":
+            monitor_state(args.fleet_state, args.interval)
+        else:
+            monitor_log(args.log_format, args.interval)
     except KeyboardInterrupt:
         print("Monitor stopped.")
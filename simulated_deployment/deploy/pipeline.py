@@ -1,104 +1,482 @@
 # pipeline.py
 import threading
 import queue
-import json
-import random
+import multiprocessing as mp
 import time
-import pandas as pd
+import argparse
+import warnings
+import numpy as np
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from build.data_loader import load_data, compute_rul
-from build.features import add_rolling_features
-from build.model import load_model_and_scaler
+from build.data_loader import load_subset_arrays, load_subset_index
+from build.engine_index import EngineIndex
+from build.features import StreamingRollingFeatures
+from predlog import open_log
+from fleetstate import FleetStateWriter, DEFAULT_NAME as FLEET_NAME, DEFAULT_CAPACITY as FLEET_CAPACITY
+from boundedqueue import BoundedQueue, POLICIES as QUEUE_POLICIES
+from replay import schedule, POLICIES
+from record import make_record, stack, SENSOR_COLS, ROLL_WINDOW
+from registry import ModelRegistry, load_model
+import instrument
 
-# In-memory queue
-Q = queue.Queue()
-# Log file for monitor
-LOG_FILE = "../model/predictions.log"
+# In-memory queue, bounded so a fast producer can't buffer the whole fleet; what a full
+# queue does (block / drop-oldest / coalesce) is set by the policy, see boundedqueue.py
+QUEUE_SIZE = 10000
+Q = BoundedQueue(QUEUE_SIZE, "block")
+# Prediction log for monitor (opened in __main__, see predlog.py for the formats)
+LOG = None
+# Shared-memory table of the latest state per engine, for monitor (fleetstate.py); None: off
+FLEET = None
 
-# Prepare producer to interleave engine sequences randomly
-def producer(train_path, test_path, rul_path, rolling_window=False):
-    # load only test data (RUL already computed in train.py)
-    _, test_df, _ = load_data(train_path, test_path, rul_path)
+# Serve the reduced-support-vector model from build/compress.py instead of the full SVR
+COMPACT_MODEL = False
+# "sklearn": scaler.transform + model.predict; "numpy": fused kernel over the inference bundle
+ENGINE = "sklearn"
+# Memory-map the model's arrays instead of copying them into each process
+MMAP_MODEL = False
+# Shared serving model (registry.py), created by start_consumers
+REGISTRY = None
 
-    sensor_cols = [c for c in test_df.columns if c.startswith('sensor_measurement')]
-    if rolling_window:
-        test_df = add_rolling_features(test_df, sensor_cols, window=20)
-        sensor_cols += [f"{c}_roll20" for c in sensor_cols]
+# Micro-batching defaults (overridable from the command line)
+BATCH_SIZE = 32
+BATCH_TIMEOUT_MS = 50
 
-    # group rows by engine
-    groups = {}
-    for row in test_df.itertuples():
-        uid = int(row.unit_number)
-        groups.setdefault(uid, []).append(row)
+# Demo pacing of the single-record consumer, and per-record console output
+CONSUMER_DELAY = 0.25
+VERBOSE = True
+# replicated engines get ids offset by this much per copy
+REPLICA_OFFSET = 10000
 
-    # Clear previous log
-    open(LOG_FILE, 'w').close()
+# batches are plain arrays, so the scaler's feature-name check has nothing to compare
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+# Replay the test engines cycle by cycle, interleaved by `order` (see replay.py)
+# rate: records/sec to emit (None = as fast as possible); replicate: copies of the fleet;
+# cycle_rate: fleet cycles/sec for the timestamp order (each cycle's records share a due time)
+def producer(subsets=("FD001",), rolling_window=False, n_consumers=3, rate=None, replicate=1,
+             order="random", cycle_rate=None, seed=None):
+    # load only test data (RUL already computed in train.py): the cached arrays, rows grouped
+    # by engine in cycle order, and their per-engine [start, end) index
+    ids, values = load_subset_arrays(subsets, 'test')
+    index = load_subset_index(subsets, 'test')
+    if replicate > 1:
+        ids = np.concatenate([ids + np.array([k * REPLICA_OFFSET, 0], dtype=np.int32) for k in range(replicate)])
+        values = np.concatenate([values] * replicate)
+        index = EngineIndex.concat([index.shifted(unit_offset=k * REPLICA_OFFSET) for k in range(replicate)])
+    # values columns are record.RAW_COLS
+    units, cycles, values = ids[:, 0], ids[:, 1], np.asarray(values)
 
-    total = sum(len(lst) for lst in groups.values())
+    # rolling means are computed per cycle as records are emitted, like a live feed would
+    rolling = StreamingRollingFeatures(SENSOR_COLS, window=ROLL_WINDOW) if rolling_window else None
+
+    total = len(ids)
     count = 0
-    print(f"[Producer] Enqueuing {total} records (interleaved)…")
-
-    # While any engine has remaining rows, pick random engine and emit its next row
-    while any(groups.values()):
-        # choose among engines with data
-        available = [uid for uid, lst in groups.items() if lst]
-        uid = random.choice(available)
-        row = groups[uid].pop(0)
-        rec = {"unit": uid, "cycle": int(row.time_in_cycles), **{c: getattr(row, c) for c in sensor_cols}}
+    print(f"[Producer] Enqueuing {total} records from {len(index)} engines ({order} order)…")
+
+    start = time.perf_counter()
+    first_cycle = int(cycles.min()) if total else 0
+    for i in schedule(index.starts, index.ends, order, cycles, seed):
+        uid = int(units[i])
+        t = instrument.clock()
+        rec = make_record(uid, int(cycles[i]), values[i], rolling)
+        instrument.lap("producer", "featurize", t)
+        # hold each record until its scheduled arrival time
+        if rate:
+            delay = start + count / rate - time.perf_counter()
+        elif cycle_rate:
+            delay = start + (rec.cycle - first_cycle) / cycle_rate - time.perf_counter()
+        else:
+            delay = 0
+        if delay > 0:
+            time.sleep(delay)
+        t = instrument.clock()
+        rec.t_enq = time.perf_counter()
         Q.put(rec)
+        instrument.lap("producer", "enqueue", t)
+        instrument.count("producer", "records")
         count += 1
-        print(f"[Producer] → enqueued {count}/{total} (Engine {uid:02d}, cycle {rec['cycle']})")
-        #time.sleep(1)
+        if VERBOSE:
+            print(f"[Producer] → enqueued {count}/{total} (Engine {uid:02d}, cycle {rec.cycle})")
 
     # signal consumers
-    for _ in range(2):
+    for _ in range(n_consumers):
         Q.put(None)
     print("[Producer] Done enqueuing.")
 
 
+def run_model(transform, predict, X, worker):
+    t = instrument.clock()
+    if transform is not None:
+        X = transform(X)
+        t = instrument.lap(worker, "scale", t)
+    preds = predict(X)
+    instrument.lap(worker, "predict", t)
+    return preds
+
+
+def persist(units, cycles, preds, version):
+    # history goes to the log, the latest state per engine to the shared fleet table
+    LOG.append_batch(units, cycles, preds, version)
+    if FLEET is not None:
+        FLEET.update_batch(units, cycles, preds, version)
+
+
 def consumer(worker_id):
-    svr, scaler = load_model_and_scaler()
-    feature_names = list(scaler.feature_names_in_)
+    name = f"consumer-{worker_id}"
 
     while True:
+        t = instrument.clock()
         rec = Q.get()
+        t = instrument.lap(name, "dequeue_wait", t)
         if rec is None:
             Q.task_done()
             print(f"[Consumer {worker_id}] exiting.")
             break
 
-        unit = rec.pop("unit")
-        cycle = rec.pop("cycle")
-        df = pd.DataFrame([rec], columns=feature_names)
-        X_s = scaler.transform(df)
-        pred = svr.predict(X_s)[0]
+        unit, cycle = rec.unit, rec.cycle
+        # a hot swap (registry.py) takes effect from the next record
+        model = REGISTRY.current
+        X = stack([rec], model.idx)
+        instrument.lap(name, "featurize", t)
+        pred = run_model(model.transform, model.predict, X, name)[0]
 
         # append to log for monitor
-        with open(LOG_FILE, "a") as f:
-            f.write(json.dumps({"unit": unit, "cycle": cycle, "rul": float(pred)}) + "\n")
+        t = instrument.clock()
+        persist([unit], [cycle], [pred], model.version)
+        instrument.lap(name, "persist", t)
+        instrument.count(name, "records")
+        record_latency([rec.t_enq])
 
-        print(f"[Consumer {worker_id}] Engine {unit:02d}, cycle {cycle} → RUL={pred:.2f}")
-        time.sleep(0.25)
+        if VERBOSE:
+            print(f"[Consumer {worker_id}] Engine {unit:02d}, cycle {cycle} → RUL={pred:.2f}")
+        if CONSUMER_DELAY:
+            time.sleep(CONSUMER_DELAY)
         Q.task_done()
 
 
+# Block for one record, then keep draining until the batch is full or the deadline passes
+def drain_batch(max_size, timeout_ms):
+    batch = [Q.get()]
+    if batch[0] is None:
+        return batch
+    deadline = time.perf_counter() + timeout_ms / 1000.0
+    while len(batch) < max_size:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        try:
+            rec = Q.get(timeout=remaining)
+        except queue.Empty:
+            break
+        batch.append(rec)
+        if rec is None:
+            break
+    return batch
+
+
+# Per-batch stats shared by all batch consumers, plus per-record enqueue→persisted latency
+STATS = {"batches": 0, "records": 0, "busy_s": 0.0, "latencies_ms": [], "e2e_ms": []}
+STATS_LOCK = threading.Lock()
+
+
+def record_latency(t_enq):
+    now = time.perf_counter()
+    with STATS_LOCK:
+        STATS["e2e_ms"].extend((now - t) * 1000 for t in t_enq)
+
+
+def batch_consumer(worker_id, batch_size=BATCH_SIZE, timeout_ms=BATCH_TIMEOUT_MS, verbose=False):
+    name = f"consumer-{worker_id}"
+
+    done = False
+    while not done:
+        t = instrument.clock()
+        batch = drain_batch(batch_size, timeout_ms)
+        instrument.lap(name, "dequeue_wait", t)
+        recs = [r for r in batch if r is not None]
+        done = len(recs) < len(batch)
+
+        if recs:
+            t0 = time.perf_counter()
+            t = instrument.clock()
+            # one matrix, one transform, one predict for the whole batch, all by one model
+            # version: a hot swap (registry.py) takes effect from the next batch
+            model = REGISTRY.current
+            X = stack(recs, model.idx)
+            instrument.lap(name, "featurize", t)
+            preds = run_model(model.transform, model.predict, X, name)
+
+            t = instrument.clock()
+            persist([r.unit for r in recs], [r.cycle for r in recs], preds, model.version)
+            instrument.lap(name, "persist", t)
+            instrument.count(name, "records", len(recs))
+            instrument.count(name, "batches")
+            elapsed = time.perf_counter() - t0
+            record_latency([r.t_enq for r in recs])
+
+            with STATS_LOCK:
+                STATS["batches"] += 1
+                STATS["records"] += len(recs)
+                STATS["busy_s"] += elapsed
+                STATS["latencies_ms"].append(elapsed * 1000)
+            if verbose:
+                print(f"[Consumer {worker_id}] batch of {len(recs)} in {elapsed*1000:.2f} ms "
+                      f"({len(recs)/elapsed:.0f} rec/s)")
+
+        for _ in batch:
+            Q.task_done()
+
+    print(f"[Consumer {worker_id}] exiting.")
+
+
+# ---- Process-pool backend ----
+# Each worker process loads the model once; the main process drains Q into batches,
+# ships them as plain arrays and writes the results back in submission order. Every
+# batch names the registry's current version, and a worker that holds another version
+# reloads the model files before predicting it. If that load fails (files replaced again,
+# a feature set records don't carry) the worker keeps predicting with the model it has,
+# like ModelRegistry.check does; the version it used is logged with every batch.
+_worker_model = None
+_worker_args = None
+_worker_failed = None  # version whose reload failed, not retried
+
+
+def _init_worker(engine, compact, mmap):
+    global _worker_model, _worker_args
+    _worker_args = (engine, compact, mmap)
+    _worker_model = load_model(engine, compact, mmap)
+
+
+def _predict_batch(batch):
+    # stage times are measured here and reported back, since workers can't reach the parent's stats
+    global _worker_model, _worker_failed
+    version, units, cycles, t_enq, R = batch
+    if _worker_model.version != version and version != _worker_failed:
+        try:
+            _worker_model = load_model(*_worker_args)
+        except Exception as e:
+            _worker_failed = version
+            print(f"[Worker {os.getpid()}] keeping model {_worker_model.version:08x}: "
+                  f"failed to load {version:08x} ({e})")
+    model = _worker_model
+    X = R[:, model.idx].astype(np.float64)
+    t0 = time.perf_counter_ns()
+    if model.transform is not None:
+        X = model.transform(X)
+    t1 = time.perf_counter_ns()
+    preds = model.predict(X)
+    t2 = time.perf_counter_ns()
+    return units, cycles, t_enq, preds, model.version, (t1 - t0, t2 - t1)
+
+
+def _array_batches(batch_size, timeout_ms):
+    while True:
+        t = instrument.clock()
+        batch = drain_batch(batch_size, timeout_ms)
+        t = instrument.lap("dispatcher", "dequeue_wait", t)
+        recs = [r for r in batch if r is not None]
+        if recs:
+            # whole float32 record vectors; the worker picks its model's columns
+            arrays = (REGISTRY.current.version,
+                      np.array([r.unit for r in recs], dtype=np.int32),
+                      np.array([r.cycle for r in recs], dtype=np.int32),
+                      np.array([r.t_enq for r in recs]),
+                      np.stack([r.x for r in recs]))
+            instrument.lap("dispatcher", "featurize", t)
+            yield arrays
+        if len(recs) < len(batch):
+            Q.task_done()  # the stop sentinel
+            return
+
+
+def process_consumer(n_workers, batch_size=BATCH_SIZE, timeout_ms=BATCH_TIMEOUT_MS, verbose=False):
+    with mp.Pool(n_workers, initializer=_init_worker, initargs=(ENGINE, COMPACT_MODEL, MMAP_MODEL)) as pool:
+        # imap returns results in submission order, so this loop is the single ordered log writer
+        results = pool.imap(_predict_batch, _array_batches(batch_size, timeout_ms))
+        for units, cycles, t_enq, preds, version, (scale_ns, predict_ns) in results:
+            elapsed = (scale_ns + predict_ns) / 1e9
+            if ENGINE != "numpy":
+                instrument.observe("pool", "scale", scale_ns)
+            instrument.observe("pool", "predict", predict_ns)
+            t = instrument.clock()
+            persist(units, cycles, preds, version)
+            instrument.lap("writer", "persist", t)
+            instrument.count("writer", "records", len(preds))
+            instrument.count("writer", "batches")
+            record_latency(t_enq)
+
+            with STATS_LOCK:
+                STATS["batches"] += 1
+                STATS["records"] += len(preds)
+                STATS["busy_s"] += elapsed
+                STATS["latencies_ms"].append(elapsed * 1000)
+            if verbose:
+                print(f"[Writer] batch of {len(preds)} in {elapsed*1000:.2f} ms "
+                      f"({len(preds)/elapsed:.0f} rec/s)")
+            for _ in preds:
+                Q.task_done()
+        # let the workers exit on their own (leaving the with-block would terminate them)
+        pool.close()
+        pool.join()
+    print(f"[Writer] {n_workers} worker processes exited.")
+
+
+def summarize_stats(wall_s):
+    with STATS_LOCK:
+        lat = np.array(STATS["latencies_ms"])
+        e2e = np.array(STATS["e2e_ms"])
+        n, b = STATS["records"], STATS["batches"]
+    out = {"records": len(e2e), "wall_s": wall_s, "records_per_s": len(e2e) / wall_s if wall_s else 0.0,
+           "queue": Q.stats()}
+    if REGISTRY is not None:
+        out.update(model_version=f"{REGISTRY.current.version:08x}", model_swaps=REGISTRY.swaps)
+    if len(e2e):
+        out.update(zip(("e2e_p50_ms", "e2e_p95_ms", "e2e_p99_ms"), np.percentile(e2e, [50, 95, 99]).tolist()))
+        out["e2e_max_ms"] = float(e2e.max())
+    if b:
+        out.update(batches=b, avg_batch=n / b, busy_records_per_s=n / lat.sum() * 1000)
+        out.update(zip(("batch_p50_ms", "batch_p95_ms", "batch_p99_ms"), np.percentile(lat, [50, 95, 99]).tolist()))
+    return out
+
+
+def report_stats(wall_s):
+    st = summarize_stats(wall_s)
+    if not st["records"]:
+        print("[Stats] no records processed.")
+        return
+    print(f"[Stats] {st['records']} records in {wall_s:.2f} s → {st['records_per_s']:.0f} rec/s")
+    print(f"[Stats] end-to-end latency ms: p50={st['e2e_p50_ms']:.2f} p95={st['e2e_p95_ms']:.2f} "
+          f"p99={st['e2e_p99_ms']:.2f} max={st['e2e_max_ms']:.2f}")
+    if "batches" in st:
+        print(f"[Stats] {st['batches']} batches (avg {st['avg_batch']:.1f}/batch), batch latency ms: "
+              f"p50={st['batch_p50_ms']:.2f} p95={st['batch_p95_ms']:.2f} p99={st['batch_p99_ms']:.2f}")
+        print(f"[Stats] busy throughput: {st['busy_records_per_s']:.0f} rec/s")
+    if "model_version" in st:
+        print(f"[Stats] serving model {st['model_version']} ({st['model_swaps']} hot swaps)")
+    q = st["queue"]
+    print(f"[Stats] queue ({q['policy']}, capacity {q['capacity']}): max depth {q['max_depth']}, "
+          f"dropped {q['dropped']}, coalesced {q['coalesced']}")
+
+
+# Starts the consumer side and returns how many stop sentinels the producer must send and
+# the consumer threads, to join once the queue has drained (the process backend's thread
+# closes its worker pool on the way out)
+def start_consumers(backend="thread", mode="single", workers=3, batch_size=BATCH_SIZE,
+                    timeout_ms=BATCH_TIMEOUT_MS, verbose=False, reload_interval=0):
+    global REGISTRY
+    # loaded here, once, so a missing model (or a feature records don't carry) fails in
+    # the caller instead of inside a thread
+    REGISTRY = ModelRegistry(ENGINE, COMPACT_MODEL, MMAP_MODEL)
+    if reload_interval:
+        REGISTRY.watch(reload_interval)
+    if backend == "process":
+        # a single dispatcher/writer thread feeds the worker pool
+        t = threading.Thread(target=process_consumer, daemon=True,
+                             args=(workers, batch_size, timeout_ms, verbose))
+        t.start()
+        return 1, [t]
+    threads = []
+    for wid in range(1, workers + 1):
+        if mode == "batch":
+            t = threading.Thread(target=batch_consumer, daemon=True,
+                                 args=(wid, batch_size, timeout_ms, verbose))
+        else:
+            t = threading.Thread(target=consumer, args=(wid,), daemon=True)
+        t.start()
+        threads.append(t)
+    return workers, threads
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated streaming RUL pipeline")
+    parser.add_argument("--mode", choices=["single", "batch"], default="single",
+                        help="single: one predict per record; batch: micro-batched predict")
+    parser.add_argument("--backend", choices=["thread", "process"], default="thread",
+                        help="process: batched inference in a pool of worker processes")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--subsets", nargs="+", default=["FD001"],
+                        choices=["FD001", "FD002", "FD003", "FD004"], help="test subsets to replay")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--batch-timeout-ms", type=float, default=BATCH_TIMEOUT_MS)
+    parser.add_argument("--model", choices=["svr", "compact"], default="svr",
+                        help="compact: reduced-support-vector model exported by build/compress.py")
+    parser.add_argument("--engine", choices=["sklearn", "numpy"], default="sklearn",
+                        help="numpy: fused kernel over the bundle exported by build/bundle.py")
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory-map the model arrays (shared page cache across worker processes)")
+    parser.add_argument("--reload-interval", type=float, default=2.0,
+                        help="seconds between checks of ../model/ for a retrained model to hot-swap (0: off)")
+    parser.add_argument("--log-format", choices=["binary", "jsonl"], default="binary",
+                        help="binary: fixed-width records in predictions.bin; jsonl: predictions.log")
+    parser.add_argument("--fleet-state", default=FLEET_NAME,
+                        help="shared-memory name of the per-engine state table monitor.py reads ('' to disable)")
+    parser.add_argument("--fleet-capacity", type=int, default=FLEET_CAPACITY, help="max engines in the state table")
+    parser.add_argument("--rate", type=float, default=None, help="arrival rate in records/sec (default: unpaced)")
+    parser.add_argument("--replicate", type=int, default=1, help="replay N copies of the fleet")
+    parser.add_argument("--order", choices=POLICIES, default="random",
+                        help="how engines are interleaved (timestamp: cycle by cycle across the fleet)")
+    parser.add_argument("--cycle-rate", type=float, default=None,
+                        help="fleet cycles/sec for --order timestamp (default: unpaced)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for --order random")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="max records waiting for inference")
+    parser.add_argument("--queue-policy", choices=QUEUE_POLICIES, default="block",
+                        help="when the queue is full: block the producer, drop the oldest record, "
+                             "or keep only the newest cycle per engine")
+    parser.add_argument("--delay", type=float, default=CONSUMER_DELAY,
+                        help="seconds the single-record consumer sleeps after each record")
+    parser.add_argument("--quiet", action="store_true", help="no per-record console output")
+    parser.add_argument("--instrument", action="store_true", help="time every pipeline stage")
+    parser.add_argument("--stats-interval", type=float, default=10.0,
+                        help="seconds between stage-timer dumps when --instrument is on (0: only at exit)")
+    parser.add_argument("--stats-port", type=int, default=None,
+                        help="serve stage timers at http://127.0.0.1:PORT/stats (implies --instrument)")
+    parser.add_argument("--verbose", action="store_true", help="print stats for every batch")
+    args = parser.parse_args()
+    if args.cycle_rate and (args.order != "timestamp" or args.rate):
+        parser.error("--cycle-rate needs --order timestamp and no --rate")
+
+    COMPACT_MODEL = args.model == "compact"
+    ENGINE = args.engine
+    MMAP_MODEL = args.mmap
+    CONSUMER_DELAY = args.delay
+    VERBOSE = not args.quiet
+    Q.configure(args.queue_size, args.queue_policy)
+
+    # Clear previous log
+    LOG = open_log(args.log_format, truncate=True)
+    FLEET = FleetStateWriter(args.fleet_state, args.fleet_capacity) if args.fleet_state else None
+
+    if args.instrument or args.stats_port is not None:
+        instrument.enable()
+        if args.stats_interval > 0:
+            instrument.start_dumper(args.stats_interval)
+        if args.stats_port is not None:
+            instrument.serve(args.stats_port)
+            print(f"[Main] stage timers at http://127.0.0.1:{args.stats_port}/stats")
+
     # start consumers
-    for wid in (1, 2, 3):
-        t = threading.Thread(target=consumer, args=(wid,), daemon=True)
-        t.start()
+    n_readers, readers = start_consumers(args.backend, args.mode, args.workers, args.batch_size,
+                                args.batch_timeout_ms, args.verbose, args.reload_interval)
 
-    producer(
-        "../../dataset/CMAPSSData/train_FD001.txt",
-        "../../dataset/CMAPSSData/test_FD001.txt",
-        "../../dataset/CMAPSSData/RUL_FD001.txt",
-        rolling_window=True
-    )
+    start = time.perf_counter()
+    producer(args.subsets, rolling_window=True, n_consumers=n_readers,
+             rate=args.rate, replicate=args.replicate, order=args.order,
+             cycle_rate=args.cycle_rate, seed=args.seed)
 
     print("[Main] Waiting for queue to drain…")
     Q.join()
-    print("[Main] All records processed.")
\ No newline at end of file
+    for t in readers:
+        t.join()
+    LOG.close()
+    if FLEET is not None:
+        if FLEET.overflow:
+            print(f"[Main] fleet state table full: {FLEET.overflow} updates for engines beyond "
+                  f"--fleet-capacity {FLEET.capacity} were not published")
+        FLEET.close()
+    print("[Main] All records processed.")
+    report_stats(time.perf_counter() - start)
+    if instrument.ENABLED:
+        print(instrument.format_table())
\ No newline at end of file
@@ -0,0 +1,280 @@
+# predlog.py
+# Prediction log formats shared by pipeline.py (writer) and monitor.py (reader).
+#
+# Binary layout: a 16-byte header (magic, then a random per-run token so readers can tell a
+# new run from an old one) followed by fixed-width little-endian records
+#   unit int32 | cycle int32 | rul float64 | ts float64 | model uint32 | pad   (32 bytes)
+# where model is the version (registry.py) of the model that produced the prediction.
+# Records are only ever appended, so a reader can memory-map everything after the header.
+import os
+import sys
+import json
+import time
+import struct
+import threading
+import numpy as np
+
+MAGIC = b'RULLOG02'
+HEADER_SIZE = 16
+_HEADER = struct.Struct('<8sQ')
+RECORD_DTYPE = np.dtype({'names': ['unit', 'cycle', 'rul', 'ts', 'model'],
+                         'formats': ['<i4', '<i4', '<f8', '<f8', '<u4'],
+                         'offsets': [0, 4, 8, 16, 24], 'itemsize': 32})
+
+BIN_LOG_FILE  = "../model/predictions.bin"
+JSON_LOG_FILE = "../model/predictions.log"
+
+
+# ---- Writers ----
+
+class BinaryLogWriter:
+    # Records are staged in a preallocated block and written with one syscall when the
+    # block fills up or flush_interval seconds have passed since the last write. A
+    # background thread enforces the interval when appends pause, so staged records still
+    # reach the file (and the monitor) during a lull.
+    def __init__(self, path=BIN_LOG_FILE, block_records=1024, flush_interval=1.0, truncate=False):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.buf = np.zeros(block_records, dtype=RECORD_DTYPE)
+        self.n = 0
+        self.lock = threading.Lock()
+        fresh = truncate or not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE
+        if not fresh:
+            _check_magic(path)
+        self.f = open(path, 'wb' if fresh else 'ab', buffering=0)
+        if fresh:
+            self.f.write(_HEADER.pack(MAGIC, int.from_bytes(os.urandom(8), 'little')))
+        self.last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._timer = None
+        if flush_interval > 0:
+            self._timer = threading.Thread(target=self._flush_loop, daemon=True)
+            self._timer.start()
+
+    def append(self, unit, cycle, rul, model=0):
+        self.append_batch([unit], [cycle], [rul], model)
+
+    def append_batch(self, units, cycles, ruls, model=0):
+        ts = time.time()
+        with self.lock:
+            i, n = 0, len(ruls)
+            while i < n:
+                k = min(n - i, len(self.buf) - self.n)
+                dst = self.buf[self.n:self.n + k]
+                dst['unit'] = units[i:i + k]
+                dst['cycle'] = cycles[i:i + k]
+                dst['rul'] = ruls[i:i + k]
+                dst['ts'] = ts
+                dst['model'] = model
+                self.n += k
+                i += k
+                if self.n == len(self.buf):
+                    self._flush()
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        if self.n:
+            self.f.write(self.buf[:self.n].tobytes())
+            self.n = 0
+        self.last_flush = time.monotonic()
+
+    def _flush_loop(self):
+        timeout = self.flush_interval
+        while not self._stop.wait(timeout):
+            with self.lock:
+                if time.monotonic() - self.last_flush >= self.flush_interval:
+                    self._flush()
+                timeout = max(self.last_flush + self.flush_interval - time.monotonic(), 0.01)
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+        self.f.close()
+
+
+class JsonlLogWriter:
+    # The original one-JSON-object-per-line format, kept for compatibility
+    def __init__(self, path=JSON_LOG_FILE, truncate=False):
+        self.path = path
+        self.lock = threading.Lock()
+        self.f = open(path, 'w' if truncate else 'a')
+
+    def append(self, unit, cycle, rul, model=0):
+        self.append_batch([unit], [cycle], [rul], model)
+
+    def append_batch(self, units, cycles, ruls, model=0):
+        ts = time.time()
+        lines = "".join(json.dumps({"unit": int(u), "cycle": int(c), "rul": float(r), "ts": ts,
+                                    "model": int(model)}) + "\n"
+                        for u, c, r in zip(units, cycles, ruls))
+        with self.lock:
+            self.f.write(lines)
+            self.f.flush()
+
+    def flush(self):
+        with self.lock:
+            self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+def open_log(fmt='binary', truncate=False):
+    if fmt == 'binary':
+        return BinaryLogWriter(truncate=truncate)
+    return JsonlLogWriter(truncate=truncate)
+
+
+# ---- Readers ----
+
+def _check_magic(path):
+    with open(path, 'rb') as f:
+        magic = f.read(len(MAGIC))
+    if magic != MAGIC:
+        if magic.startswith(MAGIC[:-2]):
+            raise ValueError(f"{path} uses an older log format ({magic.decode()}); start a new log")
+        raise ValueError(f"{path} is not a binary prediction log")
+
+
+def read_log(path=BIN_LOG_FILE, start=0):
+    # memory-mapped view of every complete record from index `start` on (empty if none)
+    size = os.path.getsize(path)
+    n = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize - start
+    if n <= 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    _check_magic(path)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r',
+                     offset=HEADER_SIZE + start * RECORD_DTYPE.itemsize, shape=(n,))
+
+
+def export_jsonl(bin_path=BIN_LOG_FILE, out_path=JSON_LOG_FILE):
+    recs = read_log(bin_path)
+    with open(out_path, 'w') as f:
+        for u, c, r, ts, m in zip(recs['unit'].tolist(), recs['cycle'].tolist(),
+                                  recs['rul'].tolist(), recs['ts'].tolist(), recs['model'].tolist()):
+            f.write(json.dumps({"unit": u, "cycle": c, "rul": r, "ts": ts, "model": m}) + "\n")
+    return len(recs)
+
+
+# Incremental readers: remember how far they got and only parse what was appended since.
+# poll() returns (list of (unit, cycle, rul), event) where event is None, 'truncated' or 'rotated'.
+# A log truncated in place and rewritten past the old offset between two polls is caught by
+# _new_run: the binary header's run token, or the first line of a JSON-lines log, changed.
+class _Tailer:
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.inode = None
+
+    def _reset(self):
+        self.offset = 0
+
+    def _new_run(self):
+        return False
+
+    def _check(self):
+        try:
+            st = os.stat(self.path)
+            new_run = self._new_run()
+        except FileNotFoundError:
+            return None, None
+        event = None
+        if self.inode is not None and st.st_ino != self.inode:
+            event = 'rotated'
+            self._reset()
+        elif new_run or st.st_size < self._min_size():
+            event = 'truncated'
+            self._reset()
+        self.inode = st.st_ino
+        return st, event
+
+
+class LogTailer(_Tailer):
+    # JSON-lines log; offset is in bytes
+    def __init__(self, path=JSON_LOG_FILE):
+        super().__init__(path)
+        self.partial = b''
+        self.head = None    # first line of the file, once read
+
+    def _reset(self):
+        self.offset = 0
+        self.partial = b''
+        self.head = None
+
+    def _new_run(self):
+        if self.head is None:
+            return False
+        with open(self.path, 'rb') as f:
+            changed = f.read(len(self.head)) != self.head
+        if changed:
+            self.head = None
+        return changed
+
+    def _min_size(self):
+        return self.offset
+
+    def poll(self):
+        st, event = self._check()
+        if st is None or st.st_size == self.offset:
+            return [], event
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        self.offset += len(chunk)
+
+        # keep a trailing half-written line for the next poll
+        data = self.partial + chunk
+        if self.head is None and self.offset == len(data) and b'\n' in data:
+            self.head = data[:data.index(b'\n') + 1]
+        cut = data.rfind(b'\n') + 1
+        self.partial = data[cut:]
+        recs = []
+        for line in data[:cut].splitlines():
+            try:
+                recs.append(json.loads(line))
+            except json.JSONDecodeError:
+                # landed mid-line after a rewrite that slipped past _new_run: resync at the next line
+                continue
+        return [(r['unit'], r['cycle'], r['rul']) for r in recs], event
+
+
+class BinaryLogTailer(_Tailer):
+    # binary log; offset is in records
+    def __init__(self, path=BIN_LOG_FILE):
+        super().__init__(path)
+        self.token = None
+
+    def _new_run(self):
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            return False
+        token = _HEADER.unpack(header)[1]
+        changed = self.token is not None and token != self.token
+        self.token = token
+        return changed
+    def _min_size(self):
+        return HEADER_SIZE + self.offset * RECORD_DTYPE.itemsize
+
+    def poll(self):
+        st, event = self._check()
+        if st is None or st.st_size < HEADER_SIZE:
+            return [], event
+        recs = read_log(self.path, start=self.offset)
+        self.offset += len(recs)
+        return list(zip(recs['unit'].tolist(), recs['cycle'].tolist(), recs['rul'].tolist())), event
+
+
+if __name__ == "__main__":
+    # python predlog.py [binary log] [jsonl output]
+    src = sys.argv[1] if len(sys.argv) > 1 else BIN_LOG_FILE
+    dst = sys.argv[2] if len(sys.argv) > 2 else JSON_LOG_FILE
+    print(f"Exported {export_jsonl(src, dst)} records from {src} to {dst}")
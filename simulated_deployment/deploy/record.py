@@ -0,0 +1,56 @@
+# record.py
+# Compact in-flight record for the pipeline queue: unit, cycle and enqueue time in slots,
+# plus one float32 vector holding the settings, raw sensors and rolling means in
+# RECORD_COLS order (the raw part matches the column order of a CMAPSS row after unit and
+# cycle). Consumers gather a batch with one np.stack and a column take, instead of
+# looking up ~45 dict keys per record and boxing every value.
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from build.data_loader import COLUMN_NAMES, SETTING_COLS
+
+SENSOR_COLS = [c for c in COLUMN_NAMES if c.startswith('sensor_measurement')]
+RAW_COLS = SETTING_COLS + SENSOR_COLS
+ROLL_WINDOW = 20
+ROLL_COLS = [f'{c}_roll{ROLL_WINDOW}' for c in SENSOR_COLS]
+RECORD_COLS = RAW_COLS + ROLL_COLS
+RECORD_DTYPE = np.float32
+
+_N_SETTINGS = len(SETTING_COLS)
+_N_RAW = len(RAW_COLS)
+
+
+class Record:
+    __slots__ = ("unit", "cycle", "t_enq", "x")
+
+    def __init__(self, unit, cycle, x, t_enq=0.0):
+        self.unit = unit
+        self.cycle = cycle
+        self.x = x
+        self.t_enq = t_enq
+
+
+def make_record(unit, cycle, raw, rolling=None):
+    # raw: one cycle's values in RAW_COLS order; rolling: StreamingRollingFeatures over
+    # SENSOR_COLS with ROLL_WINDOW, or None to leave the rolling means NaN
+    x = np.empty(len(RECORD_COLS), dtype=RECORD_DTYPE)
+    x[:_N_RAW] = raw
+    x[_N_RAW:] = np.nan if rolling is None else rolling.update(unit, raw[_N_SETTINGS:])
+    return Record(unit, cycle, x)
+
+
+def feature_index(feature_names):
+    # positions of a model's features in RECORD_COLS
+    pos = {c: i for i, c in enumerate(RECORD_COLS)}
+    missing = [c for c in feature_names if c not in pos]
+    if missing:
+        raise KeyError(f"pipeline records don't carry the features {missing}")
+    return np.array([pos[c] for c in feature_names])
+
+
+def stack(recs, idx):
+    # (len(recs), len(idx)) float64 feature matrix for a batch
+    return np.stack([r.x for r in recs])[:, idx].astype(np.float64)
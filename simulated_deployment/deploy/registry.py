@@ -0,0 +1,123 @@
+# registry.py
+# Serving-model registry: loads the model once and shares it with every consumer, and
+# optionally watches the model files in ../model/ for a retrained version. A new version
+# is loaded next to the old one and published by replacing a single reference; consumers
+# read `registry.current` once per batch, so each batch is predicted by exactly one
+# version and nothing in flight is dropped across a swap. A version is the CRC32 of the
+# model files' bytes, so it is stable across restarts and is logged with each prediction.
+import sys
+import os
+import threading
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from build.model import load_model_and_scaler, MODEL_FILE, COMPACT_MODEL_FILE, SCALER_FILE
+from build.bundle import InferenceBundle, BUNDLE_FILE, COMPACT_BUNDLE_FILE
+from record import feature_index
+
+
+def model_files(engine="sklearn", compact=False):
+    if engine == "numpy":
+        return [COMPACT_BUNDLE_FILE if compact else BUNDLE_FILE]
+    return [COMPACT_MODEL_FILE if compact else MODEL_FILE, SCALER_FILE]
+
+
+def _signature(paths):
+    sig = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except FileNotFoundError:
+            return None
+        sig.append((st.st_ino, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+def file_version(paths):
+    crc = 0
+    for p in paths:
+        with open(p, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+class LoadedModel:
+    __slots__ = ("version", "transform", "predict", "feature_names", "idx")
+
+    def __init__(self, version, transform, predict, feature_names):
+        self.version = version
+        # transform is None for the fused numpy kernel, which scales inside predict
+        self.transform = transform
+        self.predict = predict
+        self.feature_names = feature_names
+        self.idx = feature_index(feature_names)
+
+
+def load_model(engine="sklearn", compact=False, mmap=False):
+    paths = model_files(engine, compact)
+    for _ in range(3):
+        # retry if the files are replaced while we read them
+        sig = _signature(paths)
+        if sig is None:
+            missing = [str(p) for p in paths if not os.path.exists(p)]
+            raise FileNotFoundError(f"{', '.join(missing)} not found – run build/train.py "
+                                    f"(build/compress.py for compact, build/bundle.py for numpy).")
+        version = file_version(paths)
+        if engine == "numpy":
+            bundle = InferenceBundle(paths[0])
+            model = LoadedModel(version, None, bundle.predict, bundle.feature_names)
+        else:
+            svr, scaler = load_model_and_scaler(compact, mmap_mode='r' if mmap else None)
+            model = LoadedModel(version, scaler.transform, svr.predict, list(scaler.feature_names_in_))
+        if _signature(paths) == sig:
+            return model
+    raise RuntimeError(f"model files in {os.path.dirname(paths[0])} keep changing; try again later")
+
+
+class ModelRegistry:
+    def __init__(self, engine="sklearn", compact=False, mmap=False):
+        self.engine = engine
+        self.compact = compact
+        self.mmap = mmap
+        self.paths = model_files(engine, compact)
+        self._sig = _signature(self.paths)
+        self._pending = None
+        self.current = load_model(engine, compact, mmap)
+        self.swaps = 0
+        print(f"[Registry] serving model {self.current.version:08x}")
+
+    def check(self):
+        # Swap in a new version if the files changed; returns True if it did. A change is
+        # only picked up once it has stayed the same for one poll, so the model and scaler
+        # of a retrain are both in place.
+        sig = _signature(self.paths)
+        if sig is None or sig == self._sig:
+            self._pending = None
+            return False
+        if sig != self._pending:
+            self._pending = sig
+            return False
+        self._sig, self._pending = sig, None
+        try:
+            new = load_model(self.engine, self.compact, self.mmap)
+        except Exception as e:
+            print(f"[Registry] keeping model {self.current.version:08x}: failed to load new files ({e})")
+            return False
+        if new.version == self.current.version:
+            return False
+        old, self.current = self.current, new
+        self.swaps += 1
+        print(f"[Registry] hot-swapped model {old.version:08x} → {new.version:08x}")
+        return True
+
+    def watch(self, interval=2.0):
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.check()
+
+        threading.Thread(target=loop, daemon=True).start()
+        return stop
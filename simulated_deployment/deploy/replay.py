@@ -0,0 +1,77 @@
+# replay.py
+# Engine interleaving for the producer. Each engine's rows form a contiguous [start, end)
+# range of one array; the scheduler keeps a cursor per engine and yields global row
+# indices, so picking and emitting the next record costs O(1) however large the fleet.
+#   random       uniformly random engine among those with rows left (swap-remove active set)
+#   round-robin  every active engine once per round
+#   timestamp    cycle order across the fleet (all engines' cycle c before any cycle c+1),
+#                via a bucket queue keyed by cycle; pace it with a cycle rate in the producer
+import random
+
+POLICIES = ("random", "round-robin", "timestamp")
+
+
+def _random(cursor, end, rng):
+    active = [e for e in range(len(cursor)) if cursor[e] < end[e]]
+    while active:
+        pos = rng.randrange(len(active))
+        e = active[pos]
+        row = cursor[e]
+        cursor[e] = row + 1
+        yield row
+        if row + 1 == end[e]:
+            # swap-remove: move the last engine into the finished one's slot
+            active[pos] = active[-1]
+            active.pop()
+
+
+def _round_robin(cursor, end):
+    active = [e for e in range(len(cursor)) if cursor[e] < end[e]]
+    pos = 0
+    while active:
+        if pos >= len(active):
+            pos = 0
+        e = active[pos]
+        row = cursor[e]
+        cursor[e] = row + 1
+        yield row
+        if row + 1 == end[e]:
+            # the engine swapped in from the tail hasn't had its turn this round yet
+            active[pos] = active[-1]
+            active.pop()
+        else:
+            pos += 1
+
+
+def _timestamp(cursor, end, cycles):
+    # buckets[c] holds the engines whose next row is cycle c
+    buckets = {}
+    for e in range(len(cursor)):
+        if cursor[e] < end[e]:
+            buckets.setdefault(int(cycles[cursor[e]]), []).append(e)
+    c, last = min(buckets, default=0), max(buckets, default=-1)
+    while c <= last:
+        for e in buckets.pop(c, ()):
+            row = cursor[e]
+            cursor[e] = row + 1
+            yield row
+            if row + 1 < end[e]:
+                nxt = int(cycles[row + 1])
+                buckets.setdefault(nxt, []).append(e)
+                if nxt > last:
+                    last = nxt
+        c += 1
+
+
+def schedule(starts, ends, policy="random", cycles=None, seed=None):
+    # yields row indices; within an engine rows always come out in order
+    cursor, end = [int(s) for s in starts], [int(e) for e in ends]
+    if policy == "random":
+        return _random(cursor, end, random.Random(seed))
+    if policy == "round-robin":
+        return _round_robin(cursor, end)
+    if policy == "timestamp":
+        if cycles is None:
+            raise ValueError("timestamp ordering needs the per-row cycle numbers")
+        return _timestamp(cursor, end, cycles)
+    raise ValueError(f"unknown interleaving policy {policy!r}; choose from {POLICIES}")